@@ -0,0 +1,143 @@
+import os
+import sys
+import json
+import argparse
+import itertools
+from file_searcher import FileSearcher
+from data_processor import DataProcessor, TIME_MIN, TIME_MAX
+from parallel_extractor import ParallelExtractor
+from trace_cache import TraceCache
+from prefetch import Prefetcher, DEFAULT_MAX_IN_FLIGHT
+from fit_store import FitStore
+from renderer import RENDER_MODES
+from binning import BIN_STATISTICS
+from batch_fitting import INITIAL_GUESSES
+from run_plan import CANONICAL_RULES
+from pipeline import DEFAULT_FILTER_PARAMS, resolve_paths, run_filter_set
+import instrumentation
+
+GRID_KEYS = ("receptor", "testing_code", "coating_code", "target_analyte")
+
+def load_config(config_path):
+    with open(config_path, "r") as f:
+        if config_path.lower().endswith((".yaml", ".yml")):
+            import yaml  # Only needed for YAML configs
+            return yaml.safe_load(f)
+        return json.load(f)
+
+def expand_filter_sets(config):
+    # Accepts a list of filter_params dicts, {"filters": [...]}, or {"grid": {...}, "defaults": {...}}
+    if isinstance(config, list):
+        config = {"filters": config}
+
+    defaults = dict(DEFAULT_FILTER_PARAMS)
+    defaults.update(config.get("defaults", {}))
+
+    filter_sets = [dict(defaults, **filters) for filters in config.get("filters", [])]
+
+    grid = config.get("grid")
+    if grid:
+        unknown = set(grid) - set(GRID_KEYS)
+        if unknown:
+            raise ValueError(f"Unknown grid keys: {sorted(unknown)}")
+        keys = [key for key in GRID_KEYS if key in grid]
+        values = [grid[key] if isinstance(grid[key], list) else [grid[key]] for key in keys]
+        for combination in itertools.product(*values):
+            filter_sets.append(dict(defaults, **dict(zip(keys, combination))))
+
+    return filter_sets
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run many filter combinations without the GUI.")
+    parser.add_argument("config", help="JSON or YAML file with a list of filter_params or a grid")
+    parser.add_argument("--database", help="Testing Database workbook (resolved automatically if omitted)")
+    parser.add_argument("--base-dir", help="Box 'Test Data' directory (resolved automatically if omitted)")
+    parser.add_argument("--workers", type=int, default=None, help="Extraction workers (defaults to every core)")
+    parser.add_argument("--threads", action="store_true", help="Use a thread pool instead of a process pool")
+    parser.add_argument("--prefetch", type=int, default=DEFAULT_MAX_IN_FLIGHT, metavar="N",
+                        help="Log files read ahead of extraction at once (0 disables prefetching)")
+    parser.add_argument("--time-window", type=float, nargs=2, metavar=("T_MIN", "T_MAX"), default=(TIME_MIN, TIME_MAX),
+                        help="Seconds of each run log to keep")
+    parser.add_argument("--render-mode", choices=RENDER_MODES, default="serial")
+    parser.add_argument("--initial-guess", choices=INITIAL_GUESSES, default="data",
+                        help="Derive the starting parameters from the traces (data) or use the original fixed guess (legacy)")
+    parser.add_argument("--model-selection", action="store_true",
+                        help="Also compare 4PL, 5PL and exponential association fits by AIC")
+    parser.add_argument("--bootstrap", type=int, default=0, metavar="N",
+                        help="Bootstrap replicates per concentration for confidence intervals (0 disables)")
+    parser.add_argument("--bootstrap-time-budget", type=float, default=None, metavar="SECONDS",
+                        help="Stop bootstrapping after this long, whatever the replicate count")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for bootstrap resampling")
+    parser.add_argument("--memory-budget", type=float, default=None, metavar="MB",
+                        help="Stream traces into per-concentration buffers, spilling to disk past this many MB")
+    parser.add_argument("--canonical", choices=CANONICAL_RULES, default="newest",
+                        help="Which copy to analyse when a log file exists in several folders")
+    parser.add_argument("--full", action="store_true", help="Recompute every concentration instead of only changed ones")
+    parser.add_argument("--bin-width", type=float, default=None,
+                        help="Fit binned curves with this bin width in seconds")
+    parser.add_argument("--bin-statistic", choices=BIN_STATISTICS, default="mean", help="How runs are combined within a bin")
+    parser.add_argument("--compare-full-resolution", action="store_true",
+                        help="Also fit the raw points and write a binned vs full-resolution comparison CSV")
+    parser.add_argument("--no-store", action="store_true", help="Do not record fits in the fit store")
+    parser.add_argument("--verbosity", choices=list(instrumentation.VERBOSITY_LEVELS), default="info")
+    parser.add_argument("--trace", help="Write a JSONL timing trace to this path")
+    parser.add_argument("--summary", action="store_true", help="Print a per-stage timing summary at the end")
+    args = parser.parse_args(argv)
+    if args.memory_budget is not None and not args.bin_width:
+        parser.error("--memory-budget needs --bin-width (fits on raw points load every sample)")
+    if args.compare_full_resolution and not args.bin_width:
+        parser.error("--compare-full-resolution needs --bin-width")
+    if args.compare_full_resolution and args.memory_budget is not None:
+        parser.error("--compare-full-resolution fits every raw point and cannot be combined with --memory-budget")
+
+    telemetry = instrumentation.configure(enabled=args.summary or bool(args.trace), trace_path=args.trace, verbosity=args.verbosity)
+
+    filter_sets = expand_filter_sets(load_config(args.config))
+    print(f"{len(filter_sets)} filter combinations to run.")
+
+    if args.database and args.base_dir:
+        file_path, base_dir = args.database, args.base_dir
+    else:
+        file_path, base_dir = resolve_paths()
+        file_path = args.database or file_path
+        base_dir = args.base_dir or base_dir
+    # Output folders are built by joining onto base_dir more than once, which only works for absolute paths
+    file_path, base_dir = os.path.abspath(file_path), os.path.abspath(base_dir)
+
+    # The database, catalogue, trace cache and worker pool are shared by every combination
+    file_searcher = FileSearcher(base_dir=base_dir)
+    fit_store = None if args.no_store else FitStore()
+    data_processor = DataProcessor(testing_file=file_path, trace_cache=TraceCache(), time_window=tuple(args.time_window))
+
+    memory_budget = None if args.memory_budget is None else int(args.memory_budget * 1024 ** 2)
+    failed = 0
+    with ParallelExtractor(data_processor, workers=args.workers, use_threads=args.threads) as extractor, \
+            Prefetcher.for_processor(data_processor, max_in_flight=args.prefetch) as prefetcher:
+        for number, filter_params in enumerate(filter_sets, start=1):
+            print(f"[{number}/{len(filter_sets)}] Running filters: {filter_params}")
+            try:
+                with telemetry.span("filter_set", number=number):
+                    results = run_filter_set(data_processor, file_searcher, extractor, filter_params, base_dir, render_mode=args.render_mode,
+                                             incremental=not args.full, fit_store=fit_store, bin_width=args.bin_width,
+                                             bin_statistic=args.bin_statistic, prefetcher=prefetcher,
+                                             canonical_rule=args.canonical, memory_budget=memory_budget,
+                                             bootstrap_replicates=args.bootstrap, bootstrap_time_budget=args.bootstrap_time_budget,
+                                             bootstrap_seed=args.seed, initial_guess=args.initial_guess,
+                                             model_selection=args.model_selection,
+                                             compare_full_resolution=args.compare_full_resolution)
+            except Exception as e:
+                print(f"Filter combination {filter_params} failed: {e}")
+                failed += 1
+                continue
+            if results is not None:
+                print(f"Fitted {len(results.successful())}/{len(results)} concentrations.")
+
+    print(f"Batch complete: {len(filter_sets) - failed} succeeded, {failed} failed.")
+    instrumentation.log_peak_rss()
+    if args.summary:
+        print(telemetry.summary())
+    telemetry.close()
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,131 @@
+import numpy as np
+
+PARAM_NAMES = ("L", "x0", "k", "b")
+# "data" derives p0 from the traces, "legacy" uses default_initial_guess
+INITIAL_GUESSES = ("data", "legacy")
+
+def safe_exp(x):
+    # Clamp the values to avoid overflow in exp
+    return np.exp(np.clip(x, -500, 500))
+
+def sigmoid(x, L, x0, k, b):
+    return L / (1 + safe_exp(-k * (x - x0))) + b
+
+def sigmoid_batch(x, params):
+    # x is (groups, points) and params is (groups, 4)
+    L, x0, k, b = (params[:, i:i + 1] for i in range(4))
+    return sigmoid(x, L, x0, k, b)
+
+def sigmoid_jacobian(x, params):
+    # Analytic partial derivatives of the 4-parameter logistic, shape (groups, points, 4)
+    L, x0, k, _ = (params[:, i:i + 1] for i in range(4))
+    s = 1 / (1 + safe_exp(-k * (x - x0)))
+    ds = s * (1 - s)
+    jacobian = np.empty(x.shape + (4,))
+    jacobian[..., 0] = s
+    jacobian[..., 1] = -L * k * ds
+    jacobian[..., 2] = L * (x - x0) * ds
+    jacobian[..., 3] = 1.0
+    return jacobian
+
+def default_initial_guess(x, y):
+    return [np.max(y), np.median(x), 1, np.min(y)]
+
+def pad_groups(x_list, y_list, weights_list=None):
+    # Padded and non-finite points (blank UWA cells are read as NaN) get zero weight;
+    # real points get weight 1 unless weights (1 / sigma) are given
+    n_groups = len(x_list)
+    n_max = max((len(x) for x in x_list), default=0)
+    x_padded = np.zeros((n_groups, n_max))
+    y_padded = np.zeros((n_groups, n_max))
+    mask = np.zeros((n_groups, n_max))
+    for i, (x, y) in enumerate(zip(x_list, y_list)):
+        n = len(x)
+        weights = np.ones(n) if weights_list is None else np.broadcast_to(np.asarray(weights_list[i], dtype=float), (n,))
+        finite = np.isfinite(x) & np.isfinite(y) & np.isfinite(weights)
+        x_padded[i, :n] = np.where(finite, x, 0.0)
+        y_padded[i, :n] = np.where(finite, y, 0.0)
+        mask[i, :n] = np.where(finite, weights, 0.0)
+    return x_padded, y_padded, mask
+
+class BatchFitResult:
+    def __init__(self, popt, pcov, success, nfev, n_points, ssr):
+        self.popt = popt
+        self.pcov = pcov
+        self.success = success
+        self.nfev = nfev
+        self.n_points = n_points
+        self.ssr = ssr
+
+    def __len__(self):
+        return len(self.popt)
+
+def batch_fit_sigmoid(x_list, y_list, p0=None, weights=None, max_iter=500, xtol=1e-8, ftol=1e-10):
+    # Levenberg-Marquardt over every group at once; padded points carry zero weight.
+    # weights, when given, is one array of 1 / sigma per group, as with curve_fit's sigma.
+    x, y, mask = pad_groups(x_list, y_list, weights)
+    n_groups = len(x_list)
+    n_points = np.count_nonzero(mask, axis=1).astype(float)
+
+    if p0 is None:
+        p0 = [default_initial_guess(np.asarray(xi), np.asarray(yi)) for xi, yi in zip(x_list, y_list)]
+    params = np.array(p0, dtype=float).reshape(n_groups, 4)
+
+    residuals = mask * (sigmoid_batch(x, params) - y)
+    cost = np.sum(residuals ** 2, axis=1)
+    nfev = np.ones(n_groups, dtype=int)
+    damping = np.full(n_groups, 1e-3)
+    success = np.zeros(n_groups, dtype=bool)
+    stepped = np.zeros(n_groups, dtype=bool)  # At least one step was accepted
+    active = (n_points > 4) & np.isfinite(cost)
+
+    for _ in range(max_iter):
+        idx = np.flatnonzero(active)
+        if idx.size == 0:
+            break
+
+        jacobian = sigmoid_jacobian(x[idx], params[idx]) * mask[idx][..., None]
+        jtj = np.einsum("gni,gnj->gij", jacobian, jacobian)
+        jtr = np.einsum("gni,gn->gi", jacobian, residuals[idx])
+
+        # Marquardt scaling: damp each parameter relative to its own curvature
+        diagonal = np.maximum(np.einsum("gii->gi", jtj), 1e-12)
+        system = jtj + damping[idx, None, None] * (diagonal[:, :, None] * np.eye(4))
+        step = -np.einsum("gij,gj->gi", np.linalg.pinv(system), jtr)
+
+        candidate = params[idx] + step
+        candidate_residuals = mask[idx] * (sigmoid_batch(x[idx], candidate) - y[idx])
+        candidate_cost = np.sum(candidate_residuals ** 2, axis=1)
+        nfev[idx] += 1
+
+        improved = np.isfinite(candidate_cost) & (candidate_cost < cost[idx])
+        small_step = np.all(np.abs(step) <= xtol * (np.abs(params[idx]) + xtol), axis=1)
+        small_gain = (cost[idx] - candidate_cost) <= ftol * cost[idx]
+
+        step_damping = damping[idx]
+        accepted = idx[improved]
+        params[accepted] = candidate[improved]
+        residuals[accepted] = candidate_residuals[improved]
+        cost[accepted] = candidate_cost[improved]
+        damping[accepted] = np.maximum(damping[accepted] * 0.3, 1e-12)
+        damping[idx[~improved]] *= 10
+        stepped[accepted] = True
+
+        # A step that cannot improve the cost any further means the group has converged, unless no step
+        # was ever accepted: a tiny step then only counts while it is undamped (the start is already the
+        # optimum), and runaway damping means the starting point could not be improved on, so the fit failed
+        exhausted = damping[idx] > 1e15
+        converged = (small_step & (stepped[idx] | (step_damping < 1))) | (improved & small_gain) | (exhausted & stepped[idx])
+        success[idx[converged]] = True
+        active[idx[converged | exhausted]] = False
+
+    jacobian = sigmoid_jacobian(x, params) * mask[..., None]
+    jtj = np.einsum("gni,gnj->gij", jacobian, jacobian)
+    dof = n_points - 4
+    with np.errstate(divide="ignore", invalid="ignore"):
+        scale = np.where(dof > 0, cost / dof, np.inf)
+    pcov = np.full((n_groups, 4, 4), np.inf)
+    finite = np.all(np.isfinite(jtj), axis=(1, 2)) & (dof > 0)
+    pcov[finite] = np.linalg.pinv(jtj[finite]) * scale[finite, None, None]
+
+    return BatchFitResult(params, pcov, success, nfev, n_points, cost)
@@ -0,0 +1,72 @@
+import os
+import sys
+import time
+import argparse
+import numpy as np
+from scipy.optimize import curve_fit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from batch_fitting import sigmoid, batch_fit_sigmoid, default_initial_guess
+from fit_models import data_driven_guess
+
+def make_groups(n_groups, n_points, seed=0):
+    rng = np.random.default_rng(seed)
+    x_list, y_list, truth = [], [], []
+    for i in range(n_groups):
+        params = [1 + 0.1 * i, rng.uniform(150, 450), rng.uniform(0.01, 0.1), rng.uniform(-0.2, 0.2)]
+        x = np.sort(rng.uniform(0, 600, n_points))
+        y = sigmoid(x, *params) + rng.normal(0, 0.02, n_points)
+        x_list.append(x)
+        y_list.append(y)
+        truth.append(params)
+    return x_list, y_list, np.array(truth)
+
+def run_curve_fit(x_list, y_list, guess=default_initial_guess):
+    popts = []
+    evaluations = 0
+    for x, y in zip(x_list, y_list):
+        try:
+            popt, _, info, _, _ = curve_fit(sigmoid, x, y, guess(x, y), method='trf', maxfev=10000, full_output=True)
+            evaluations += info["nfev"]
+        except Exception:
+            popt = np.full(4, np.nan)
+            evaluations += 10000
+        popts.append(popt)
+    return np.array(popts), evaluations
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare batched sigmoid fitting with per-group curve_fit.")
+    parser.add_argument("--groups", type=int, nargs="+", default=[4, 16, 64])
+    parser.add_argument("--points", type=int, default=6000)
+    args = parser.parse_args(argv)
+
+    print(f"{'groups':>8} {'curve_fit (s)':>14} {'batch (s)':>10} {'speedup':>8} {'max |dx0|':>10}")
+    for n_groups in args.groups:
+        x_list, y_list, _ = make_groups(n_groups, args.points)
+
+        start = time.perf_counter()
+        reference, _ = run_curve_fit(x_list, y_list)
+        curve_fit_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        result = batch_fit_sigmoid(x_list, y_list)
+        batch_time = time.perf_counter() - start
+
+        x0_difference = np.nanmax(np.abs(result.popt[:, 1] - reference[:, 1]))
+        print(f"{n_groups:>8} {curve_fit_time:>14.3f} {batch_time:>10.3f} {curve_fit_time / batch_time:>8.1f} {x0_difference:>10.2e}")
+        if not result.success.all():
+            print(f"    {np.count_nonzero(~result.success)} groups did not converge")
+
+    # Evaluation counts with the legacy k=1 seed versus data-derived initial guesses
+    print(f"\n{'groups':>8} {'guess':>8} {'curve_fit nfev':>15} {'batch nfev':>11} {'batch (s)':>10}")
+    for n_groups in args.groups:
+        x_list, y_list, _ = make_groups(n_groups, args.points)
+        for name, guess in (("legacy", default_initial_guess), ("data", data_driven_guess)):
+            _, curve_fit_evaluations = run_curve_fit(x_list, y_list, guess)
+            start = time.perf_counter()
+            result = batch_fit_sigmoid(x_list, y_list, p0=[guess(x, y) for x, y in zip(x_list, y_list)])
+            batch_time = time.perf_counter() - start
+            print(f"{n_groups:>8} {name:>8} {curve_fit_evaluations:>15} {int(result.nfev.sum()):>11} {batch_time:>10.3f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+import os
+import sys
+import shutil
+import argparse
+import tempfile
+import subprocess
+import statistics
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+# Each snippet runs in a fresh interpreter and prints its own wall time, so import costs are cold
+TIMED = """
+import time
+start = time.perf_counter()
+{body}
+print(time.perf_counter() - start)
+"""
+
+STARTUP_SNIPPETS = {
+    "import main": "import main",
+    "eager imports (previous startup)": "import pandas, scipy.optimize, matplotlib.figure, plotting, fit_store, data_processor, main",
+    "filter values from meta JSON": "from database_cache import load_filter_values; load_filter_values({database!r})",
+    "database load (pandas + cache)": "from database_cache import load_testing_database; load_testing_database({database!r})",
+}
+
+def time_snippet(body, env, repeat):
+    samples = []
+    for _ in range(repeat):
+        output = subprocess.check_output([sys.executable, "-c", TIMED.format(body=body)], cwd=REPO_DIR, env=env, text=True)
+        samples.append(float(output.strip().splitlines()[-1]))
+    return statistics.median(samples)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time what the GUI needs before the filter window can open.")
+    parser.add_argument("--rows", type=int, default=5000, help="Testing Database rows")
+    parser.add_argument("--repeat", type=int, default=5, help="Fresh interpreters per measurement (median reported)")
+    args = parser.parse_args(argv)
+
+    from benchmarks.synthetic_data import write_testing_database
+
+    work_dir = tempfile.mkdtemp(prefix="curve_fitter_startup_")
+    try:
+        env = dict(os.environ, CURVE_FITTER_CACHE=os.path.join(work_dir, "cache"))
+        database_path = os.path.join(work_dir, "Testing Database.xlsx")
+        write_testing_database(database_path, args.rows, [])
+
+        # Fill the database cache once, as any earlier session would have
+        subprocess.check_call([sys.executable, "-c", f"from database_cache import load_testing_database; load_testing_database({database_path!r})"],
+                              cwd=REPO_DIR, env=env, stdout=subprocess.DEVNULL)
+
+        print(f"{'measurement':<36} {'median (s)':>10}")
+        for name, body in STARTUP_SNIPPETS.items():
+            seconds = time_snippet(body.format(database=database_path), env, args.repeat)
+            print(f"{name:<36} {seconds:>10.3f}")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
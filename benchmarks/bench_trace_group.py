@@ -0,0 +1,53 @@
+import os
+import sys
+import time
+import argparse
+import tracemalloc
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from dlog_reader import Trace
+from trace_group import TraceGroup
+
+def make_traces(n_runs, n_points):
+    rng = np.random.default_rng(0)
+    time_values = np.arange(n_points, dtype=float)
+    return [Trace(f"run{i:04d}_dlog_recalc.xlsx", time_values, rng.normal(size=n_points)) for i in range(n_runs)]
+
+def concatenate_loop(traces):
+    # The previous accumulation: one np.concatenate per run
+    all_x_data = np.array([])
+    all_y_data = np.array([])
+    for trace in traces:
+        all_x_data = np.concatenate((all_x_data, trace.time))
+        all_y_data = np.concatenate((all_y_data, trace.values))
+    return all_x_data, all_y_data
+
+def preallocated(traces):
+    group = TraceGroup.from_traces(0, traces)
+    return group.time, group.values
+
+def measure(func, traces):
+    tracemalloc.start()
+    start = time.perf_counter()
+    func(traces)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare per-run concatenation with the preallocated TraceGroup.")
+    parser.add_argument("--runs", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--points", type=int, default=600)
+    args = parser.parse_args(argv)
+
+    print(f"{'runs':>6} {'concat (s)':>11} {'concat peak MB':>15} {'group (s)':>10} {'group peak MB':>14}")
+    for n_runs in args.runs:
+        traces = make_traces(n_runs, args.points)
+        concat_time, concat_peak = measure(concatenate_loop, traces)
+        group_time, group_peak = measure(preallocated, traces)
+        print(f"{n_runs:>6} {concat_time:>11.4f} {concat_peak / 1024 ** 2:>15.2f} {group_time:>10.4f} {group_peak / 1024 ** 2:>14.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import subprocess
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+DEFAULT_FILTER = {
+    "receptor": "succyl-betacylcodextrin",
+    "testing_code": "TC58",
+    "coating_code": 122,
+    "target_analyte": "PFOA",
+    "run_result_classification": ["Low Response", "High Response", "Good", None]
+}
+
+def git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+class StageTimer:
+    def __init__(self):
+        self.stages = {}
+
+    def time(self, name, func, items=1):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        self.stages[name] = {"seconds": elapsed, "items": items, "seconds_per_item": elapsed / max(items, 1)}
+        print(f"{name:<32} {elapsed:>9.3f} s  ({items} items)")
+        return result
+
+def run_suite(work_dir, n_rows, n_files, n_points):
+    # Every cache is redirected into the work directory so runs start cold
+    os.environ["CURVE_FITTER_CACHE"] = os.path.join(work_dir, "cache")
+    from benchmarks.synthetic_data import write_dlog_tree, write_testing_database
+    from file_searcher import FileSearcher
+    from data_processor import DataProcessor
+    from trace_cache import TraceCache
+    from plotting import Plotting
+    from batch_fitting import default_initial_guess
+    from scipy.optimize import curve_fit
+
+    base_dir = os.path.join(work_dir, "Test Data")
+    database_path = os.path.join(work_dir, "Testing Database.xlsx")
+    print(f"Generating {n_files} logs and a {n_rows}-row database in {work_dir}...")
+    logs = write_dlog_tree(base_dir, n_files, n_points)
+    write_testing_database(database_path, n_rows, logs)
+
+    timer = StageTimer()
+    timer.time("file_searcher_preload_cold", lambda: FileSearcher(base_dir), n_files)
+    file_searcher = timer.time("file_searcher_preload_warm", lambda: FileSearcher(base_dir), n_files)
+
+    data_processor = DataProcessor(database_path)
+    timer.time("load_and_filter_data_cold", lambda: data_processor.load_and_filter_data(DEFAULT_FILTER), n_rows)
+    final_df = timer.time("load_and_filter_data_warm", lambda: data_processor.load_and_filter_data(DEFAULT_FILTER), n_rows)
+
+    tasks = [(row["Analyte Concentration"], path)
+             for _, row in final_df.iterrows()
+             for path in file_searcher.search_files(row["Cleaned Log Filename"])]
+
+    def extract_all(processor):
+        uwa_data_by_concentration = {}
+        for concentration, path in tasks:
+            trace = processor.extract_filtered_data(path)
+            if trace is not None and len(trace) > 0:
+                uwa_data_by_concentration.setdefault(concentration, []).append(trace)
+        return uwa_data_by_concentration
+
+    uwa_data_by_concentration = timer.time("extract_filtered_data", lambda: extract_all(data_processor), len(tasks))
+    cached_processor = DataProcessor(database_path, trace_cache=TraceCache())
+    timer.time("extract_filtered_data_cache_fill", lambda: extract_all(cached_processor), len(tasks))
+    timer.time("extract_filtered_data_cache_hit", lambda: extract_all(cached_processor), len(tasks))
+
+    plotter = Plotting(os.path.join(work_dir, "Visuals"), "benchmark", render_mode="serial")
+    results = timer.time("curve_fit", lambda: plotter.compute_fits(uwa_data_by_concentration), len(uwa_data_by_concentration))
+
+    def per_group_curve_fit():
+        # The original one-curve_fit-per-concentration path, kept as a reference point
+        for fit in results:
+            x_data, y_data = fit.group.time, fit.group.values
+            try:
+                curve_fit(plotter.sigmoid, x_data, y_data, default_initial_guess(x_data, y_data), method='trf', maxfev=10000)
+            except RuntimeError:
+                pass
+
+    timer.time("curve_fit_per_group_scipy", per_group_curve_fit, len(results))
+    timer.time("savefig", lambda: plotter.render(results), len(results) + 1)
+
+    return timer.stages
+
+def compare(stages, baseline_path):
+    with open(baseline_path, "r") as f:
+        baseline = json.load(f)["stages"]
+    print(f"\n{'stage':<32} {'baseline (s)':>13} {'current (s)':>12} {'ratio':>7}")
+    for name, stage in stages.items():
+        if name in baseline:
+            ratio = stage["seconds"] / baseline[name]["seconds"] if baseline[name]["seconds"] else float("nan")
+            print(f"{name:<32} {baseline[name]['seconds']:>13.3f} {stage['seconds']:>12.3f} {ratio:>7.2f}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time each pipeline stage on synthetic data.")
+    parser.add_argument("--rows", type=int, default=5000, help="Testing Database rows")
+    parser.add_argument("--files", type=int, default=60, help="Number of _dlog_recalc.xlsx files")
+    parser.add_argument("--points", type=int, default=900, help="Samples per log")
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--compare", help="Earlier results JSON to compare against")
+    parser.add_argument("--keep", action="store_true", help="Keep the generated data directory")
+    args = parser.parse_args(argv)
+
+    work_dir = tempfile.mkdtemp(prefix="curve_fitter_bench_")
+    try:
+        stages = run_suite(work_dir, args.rows, args.files, args.points)
+    finally:
+        if args.keep:
+            print(f"Synthetic data kept in {work_dir}")
+        else:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    report = {
+        "revision": git_revision(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "parameters": {"rows": args.rows, "files": args.files, "points": args.points},
+        "stages": stages,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.compare:
+        compare(stages, args.compare)
+
+if __name__ == "__main__":
+    main()
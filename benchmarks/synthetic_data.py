@@ -0,0 +1,65 @@
+import os
+import numpy as np
+import pandas as pd
+
+RECEPTORS = ["succyl-betacylcodextrin", "beta-cyclodextrin", "gamma-cyclodextrin"]
+TESTING_CODES = ["TC58", "TC59", "TC60"]
+COATING_CODES = [122, 123, 124]
+ANALYTES = ["PFOA", "PFOS"]
+CONCENTRATIONS = [0, 1, 5, 10, 50, 100]
+CLASSIFICATIONS = ["Low Response", "High Response", "Good", "Bad", None]
+
+def sigmoid_trace(rng, concentration, n_points, t_start=-30.0, dt=1.0):
+    time = t_start + dt * np.arange(n_points)
+    L = 0.5 + concentration / 50
+    x0 = rng.uniform(200, 350) - concentration
+    k = rng.uniform(0.01, 0.06)
+    b = rng.normal(0, 0.05)
+    uwa = L / (1 + np.exp(-k * (time - x0))) + b + rng.normal(0, 0.02, n_points)
+    return time, uwa
+
+def write_dlog_tree(base_dir, n_files, n_points=900, n_subdirs=10, seed=0):
+    # Returns (log filename, concentration) pairs in the Testing Database's "_dlog" form
+    rng = np.random.default_rng(seed)
+    logs = []
+    for i in range(n_files):
+        concentration = CONCENTRATIONS[i % len(CONCENTRATIONS)]
+        subdir = os.path.join(base_dir, f"batch_{i % n_subdirs:03d}", f"run_{i:05d}")
+        os.makedirs(subdir, exist_ok=True)
+
+        time, uwa = sigmoid_trace(rng, concentration, n_points)
+        df = pd.DataFrame({
+            "Index": np.arange(n_points),
+            "Time from Start (sec)": time,
+            "UWA_Raw": uwa + 1.0,
+            "UWA_BaselineCorr_2": uwa,
+        })
+        df.to_excel(os.path.join(subdir, f"log_{i:05d}_dlog_recalc.xlsx"), index=False)
+        logs.append((f"log_{i:05d}_dlog", concentration))
+    return logs
+
+def write_testing_database(path, n_rows, logs, seed=0):
+    # The first len(logs) rows match the default filter so they resolve to real files
+    rng = np.random.default_rng(seed)
+    rows = []
+    for i in range(n_rows):
+        if i < len(logs):
+            log_filename, concentration = logs[i]
+            receptor, testing_code, coating_code, analyte = RECEPTORS[0], TESTING_CODES[0], COATING_CODES[0], ANALYTES[0]
+        else:
+            log_filename = f"missing_{i:06d}_dlog"
+            concentration = CONCENTRATIONS[i % len(CONCENTRATIONS)]
+            receptor = RECEPTORS[rng.integers(len(RECEPTORS))]
+            testing_code = TESTING_CODES[rng.integers(len(TESTING_CODES))]
+            coating_code = COATING_CODES[rng.integers(len(COATING_CODES))]
+            analyte = ANALYTES[rng.integers(len(ANALYTES))]
+        rows.append({
+            "Receptor": f" {receptor.title()} " if i % 7 == 0 else receptor,
+            "Testing Code": testing_code,
+            "Coating Code": coating_code,
+            "Target Analyte": analyte,
+            "Run Result Classification": CLASSIFICATIONS[i % 3] if i < len(logs) else CLASSIFICATIONS[i % len(CLASSIFICATIONS)],
+            "Log Filename": log_filename,
+            "Analyte Concentration": concentration,
+        })
+    pd.DataFrame(rows).to_excel(path, sheet_name="Testing Database", index=False)
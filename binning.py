@@ -0,0 +1,70 @@
+import numpy as np
+
+BIN_STATISTICS = ("mean", "median")
+
+class BinnedCurve:
+    def __init__(self, time, values, standard_error, n_runs, run_means=None):
+        self.time = time
+        self.values = values
+        self.standard_error = standard_error
+        self.n_runs = n_runs  # runs contributing to each bin
+        self.run_means = run_means  # (runs, bins) per-run bin means the curve was combined from
+
+    def __len__(self):
+        return len(self.time)
+
+    @property
+    def weights(self):
+        return 1 / self.standard_error
+
+def bin_group(group, bin_width, statistic="mean"):
+    # Resample every run onto one time grid (per-run bin means), then combine runs per bin.
+    # Each run counts once per bin however high its sampling rate was.
+    if statistic not in BIN_STATISTICS:
+        raise ValueError(f"Unknown bin statistic {statistic!r}, expected one of {BIN_STATISTICS}")
+    centers, per_run = run_bin_means(group, bin_width)
+    return combine_runs(centers, per_run, statistic)
+
+def run_bin_means(group, bin_width):
+    # (bin centres, (runs, bins) array of each run's mean per bin, NaN where a run has no samples)
+    finite = np.isfinite(group.time)
+    t_min, t_max = np.min(group.time[finite]), np.max(group.time[finite])
+    n_bins = max(int(np.ceil((t_max - t_min) / bin_width)), 1)
+    edges = t_min + bin_width * np.arange(n_bins + 1)
+    centers = (edges[:-1] + edges[1:]) / 2
+
+    per_run = np.full((len(group), n_bins), np.nan)
+    for i, (time, values, _) in enumerate(group.runs()):
+        valid = np.isfinite(time) & np.isfinite(values)
+        bins = np.clip(((time[valid] - t_min) // bin_width).astype(np.intp), 0, n_bins - 1)
+        sums = np.bincount(bins, weights=values[valid], minlength=n_bins)
+        counts = np.bincount(bins, minlength=n_bins)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            per_run[i] = np.where(counts > 0, sums / counts, np.nan)
+    return centers, per_run
+
+def combine_runs(centers, per_run, statistic="mean"):
+    # Also used by the bootstrap, which resamples rows of per_run
+    n_runs = np.sum(np.isfinite(per_run), axis=0)
+    occupied = n_runs > 0
+    per_run = per_run[:, occupied]
+    n_runs = n_runs[occupied]
+
+    if statistic == "median":
+        values = np.nanmedian(per_run, axis=0)
+    else:
+        values = np.nanmean(per_run, axis=0)
+
+    # Standard error across runs; bins seen by a single run borrow the typical error of the others
+    standard_error = np.full(len(values), np.nan)
+    multi = n_runs > 1
+    if multi.any():
+        spread = np.nanstd(per_run[:, multi], axis=0, ddof=1)
+        standard_error[multi] = spread / np.sqrt(n_runs[multi])
+        if statistic == "median":
+            standard_error[multi] *= np.sqrt(np.pi / 2)  # asymptotic efficiency of the median
+    positive = standard_error[np.isfinite(standard_error) & (standard_error > 0)]
+    fallback = np.median(positive) if positive.size else 1.0
+    standard_error[~np.isfinite(standard_error) | (standard_error <= 0)] = fallback
+
+    return BinnedCurve(centers[occupied], values, standard_error, n_runs, per_run)
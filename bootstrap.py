@@ -0,0 +1,212 @@
+import os
+import time
+import zlib
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pickle import PicklingError
+from batch_fitting import batch_fit_sigmoid, sigmoid_batch, PARAM_NAMES
+from kinetics import kinetic_descriptors
+from binning import combine_runs
+from instrumentation import log, span, count
+
+DEFAULT_CONFIDENCE = 0.95
+BATCH_SIZE = 50  # Replicates refitted per vectorized LM call
+# Descriptors that get percentile intervals (stored as <name>_ci_low / <name>_ci_high)
+INTERVAL_DESCRIPTORS = ("second_derivative_min", "inflection_point", "plateau", "t50")
+
+def batch_seed(seed, concentration, batch_index):
+    # Keyed by concentration and batch, so replicates do not depend on worker count or scheduling order
+    return np.random.SeedSequence(seed, spawn_key=(zlib.crc32(str(concentration).encode("utf-8")), batch_index))
+
+class RawRuns:
+    # Resampling source for fits made on the pooled raw points
+    def __init__(self, time_values, uwa_values, offsets):
+        self.time_values = time_values
+        self.uwa_values = uwa_values
+        self.offsets = offsets
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def replicate(self, run_indices):
+        pieces = [(self.offsets[i], self.offsets[i + 1]) for i in run_indices]
+        x = np.concatenate([self.time_values[start:end] for start, end in pieces])
+        y = np.concatenate([self.uwa_values[start:end] for start, end in pieces])
+        return x, y, None
+
+class BinnedRuns:
+    # Resampling source for binned fits: resampled runs are rebinned exactly as bin_group would,
+    # and refitted with their own standard-error weights, so replicates follow the same estimator
+    def __init__(self, centers, run_means, statistic):
+        self.centers = centers
+        self.run_means = run_means
+        self.statistic = statistic
+
+    def __len__(self):
+        return len(self.run_means)
+
+    def replicate(self, run_indices):
+        curve = combine_runs(self.centers, self.run_means[run_indices], self.statistic)
+        return curve.time, curve.values, curve.weights
+
+def runs_for(fit, bin_statistic="mean"):
+    if fit.binned is not None:
+        return BinnedRuns(fit.binned.time, fit.binned.run_means, bin_statistic)
+    group = fit.group
+    return RawRuns(group.time, group.values, group.offsets)
+
+def bootstrap_batches(concentration, runs, base_popt, seed, batches, deadline=None, cancel_event=None):
+    # batches is a list of (batch_index, size). Each batch resamples whole runs with replacement and is
+    # refitted in one vectorized LM call warm-started from the base fit. Batches are not started after
+    # the deadline (a time.time() value) or once cancel_event is set (in-process workers only).
+    n_runs = len(runs)
+    samples = []
+    attempted = 0
+    for batch_index, size in batches:
+        if deadline is not None and time.time() > deadline:
+            break
+        if cancel_event is not None and cancel_event.is_set():
+            break
+        rng = np.random.default_rng(batch_seed(seed, concentration, batch_index))
+        replicates = [runs.replicate(rng.integers(n_runs, size=n_runs)) for _ in range(size)]
+        weights = None if replicates[0][2] is None else [w for _, _, w in replicates]
+        result = batch_fit_sigmoid([x for x, _, _ in replicates], [y for _, y, _ in replicates], p0=[base_popt] * size,
+                                   weights=weights)
+        samples.append(result.popt[result.success])
+        attempted += size
+    return concentration, np.concatenate(samples) if samples else np.empty((0, 4)), attempted
+
+class BootstrapResult:
+    def __init__(self, concentration, samples, n_attempted, confidence=DEFAULT_CONFIDENCE):
+        self.concentration = concentration
+        self.samples = samples  # (replicates, 4) popt of the converged refits
+        self.n_attempted = n_attempted
+        self.confidence = confidence
+        self.intervals = {}  # name -> (low, high) for the parameters and INTERVAL_DESCRIPTORS
+        self.band = None  # (lower, upper) of the fitted curve on the fit's x_fit grid
+
+        if len(samples):
+            tail = 100 * (1 - confidence) / 2
+            descriptors = kinetic_descriptors(samples)
+            columns = dict(zip(PARAM_NAMES, samples.T))
+            columns.update((name, descriptors[name]) for name in INTERVAL_DESCRIPTORS)
+            for name, values in columns.items():
+                values = values[np.isfinite(values)]
+                if values.size:
+                    self.intervals[name] = tuple(np.percentile(values, [tail, 100 - tail]))
+
+    @property
+    def n_replicates(self):
+        return len(self.samples)
+
+    def compute_band(self, x_fit):
+        if not len(self.samples):
+            return None
+        tail = 100 * (1 - self.confidence) / 2
+        curves = sigmoid_batch(np.broadcast_to(x_fit, (len(self.samples), len(x_fit))), self.samples)
+        self.band = tuple(np.nanpercentile(curves, [tail, 100 - tail], axis=0))
+        return self.band
+
+    def descriptors(self):
+        values = {"bootstrap_replicates": self.n_replicates}
+        for name in INTERVAL_DESCRIPTORS:
+            if name in self.intervals:
+                values[f"{name}_ci_low"], values[f"{name}_ci_high"] = self.intervals[name]
+        return values
+
+class Bootstrapper:
+    def __init__(self, n_replicates=200, confidence=DEFAULT_CONFIDENCE, time_budget=None, workers=None, seed=0,
+                 use_threads=False, batch_size=BATCH_SIZE, bin_statistic="mean", cancel_event=None):
+        self.n_replicates = n_replicates  # Cap per concentration
+        self.confidence = confidence
+        self.time_budget = time_budget  # Seconds for the whole bootstrap; None runs every replicate
+        self.workers = workers or os.cpu_count() or 1
+        self.seed = seed
+        self.use_threads = use_threads
+        self.batch_size = batch_size
+        self.bin_statistic = bin_statistic  # How binned fits combine runs, reused when rebinning replicates
+        self.cancel_event = cancel_event  # Checked between jobs, and between batches of in-process jobs
+        self.interrupted = False  # Whether the last run() skipped replicates because it was cancelled
+
+    def cancelled(self):
+        return self.cancel_event is not None and self.cancel_event.is_set()
+
+    def jobs(self, fits, deadline):
+        # Each group's batches are dealt round-robin into up to `workers` jobs, and jobs are ordered so every
+        # group makes progress at once; under a time budget no group is starved by the ones before it
+        batches = [(index, min(self.batch_size, self.n_replicates - first))
+                   for index, first in enumerate(range(0, self.n_replicates, self.batch_size))]
+        n_chunks = max(min(self.workers, len(batches)), 1)
+        jobs = []
+        for fit in fits:
+            if not fit.succeeded or fit.group is None:
+                continue
+            if len(fit.group) < 2:
+                log(f"Skipping bootstrap for concentration {fit.concentration}: only one run.", "debug")
+                continue
+            runs = runs_for(fit, self.bin_statistic)
+            base_popt = np.asarray(fit.popt, dtype=float)
+            for chunk in range(n_chunks):
+                jobs.append((chunk, (fit.concentration, runs, base_popt, self.seed, batches[chunk::n_chunks], deadline)))
+        return [job for _, job in sorted(jobs, key=lambda item: item[0])]
+
+    def run(self, fits):
+        # Returns concentration -> BootstrapResult for every fitted group with at least two runs
+        self.interrupted = False
+        deadline = None if self.time_budget is None else time.time() + self.time_budget
+        jobs = self.jobs(fits, deadline)
+        if not jobs:
+            return {}
+        with span("bootstrap", batches=len(jobs), replicates=self.n_replicates, workers=self.workers):
+            outputs = self._map(jobs)
+        expected = self.n_replicates * len({job[0] for job in jobs})
+        self.interrupted = self.cancelled() and sum(size for _, _, size in outputs) < expected
+        if self.interrupted:
+            log("Bootstrap cancelled; intervals use the replicates that finished.")
+
+        # Each replicate is seeded by its batch, so the set of samples is the same for any worker count
+        samples, attempted = {}, {}
+        for concentration, batch_samples, size in outputs:
+            samples.setdefault(concentration, []).append(batch_samples)
+            attempted[concentration] = attempted.get(concentration, 0) + size
+
+        results = {}
+        for concentration, chunks in samples.items():
+            results[concentration] = BootstrapResult(concentration, np.concatenate(chunks), attempted[concentration], self.confidence)
+            count("bootstrap_refits", attempted[concentration])
+            if attempted[concentration] < self.n_replicates and not self.interrupted:
+                log(f"Bootstrap for concentration {concentration} stopped at the time budget after "
+                    f"{attempted[concentration]} replicates.")
+        log(f"Bootstrapped {len(results)} concentrations (up to {self.n_replicates} replicates each).")
+        return results
+
+    def _map(self, jobs):
+        if len(jobs) == 1 or self.workers == 1:
+            outputs = []
+            for job in jobs:
+                if self.cancelled():
+                    break
+                outputs.append(bootstrap_batches(*job, cancel_event=self.cancel_event))
+            return outputs
+        if not self.use_threads:
+            try:
+                with ProcessPoolExecutor(max_workers=min(self.workers, len(jobs))) as executor:
+                    # An Event cannot be sent to worker processes, so cancellation only drops queued jobs
+                    return self._collect(executor, jobs)
+            except (BrokenProcessPool, PicklingError, OSError) as e:
+                log(f"Process pool unavailable ({e}), bootstrapping with threads...")
+                self.use_threads = True
+        with ThreadPoolExecutor(max_workers=min(self.workers, len(jobs))) as executor:
+            return self._collect(executor, jobs, self.cancel_event)
+
+    def _collect(self, executor, jobs, cancel_event=None):
+        futures = [executor.submit(bootstrap_batches, *job, cancel_event=cancel_event) for job in jobs]
+        outputs = []
+        for future in futures:
+            if self.cancelled():
+                for pending in futures:
+                    pending.cancel()
+                break
+            outputs.append(future.result())
+        return outputs
@@ -0,0 +1,13 @@
+import os
+
+# Override with the CURVE_FITTER_CACHE environment variable to relocate every cache
+CACHE_ROOT = os.environ.get("CURVE_FITTER_CACHE", os.path.join(os.path.expanduser("~"), ".curve_fitter"))
+
+def cache_dir(name):
+    path = os.path.join(CACHE_ROOT, name)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+def data_file(name):
+    os.makedirs(CACHE_ROOT, exist_ok=True)
+    return os.path.join(CACHE_ROOT, name)
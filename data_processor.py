@@ -1,46 +1,54 @@
-import pandas as pd
 import time
+from database_cache import load_testing_database
+from dlog_reader import Trace, read_trace
+from instrumentation import log, record
+
+# Only this window of each run log is kept
+TIME_MIN = 0
+TIME_MAX = 600
 
 class DataProcessor:
-    def __init__(self, testing_file):
+    def __init__(self, testing_file, trace_cache=None, time_window=(TIME_MIN, TIME_MAX)):
         self.testing_file = testing_file
+        self.trace_cache = trace_cache
+        self.time_window = time_window
+        self._filter_index = None
 
-    def load_and_filter_data(self, filter_params):
-        print("Loading and filtering data...")
-        start_time = time.time()
-
-        # Load the Testing Database sheet
-        df = pd.read_excel(self.testing_file, sheet_name="Testing Database")
-        print(f"Initial DataFrame row count: {len(df)}")
+    def filter_index(self, df):
+        # Rebuilt only when the database cache hands back a different DataFrame
+        if self._filter_index is None or self._filter_index.df is not df:
+            from filter_index import FilterIndex  # pandas; kept out of spawned extraction workers
+            self._filter_index = FilterIndex(df)
+        return self._filter_index
 
-        # Apply filters one by one and print the row count
-        receptor_filtered_df = df[df["Receptor"].str.strip().str.lower() == filter_params["receptor"].lower()]
-        print(f"After applying receptor filter (Receptor: {filter_params['receptor']}), row count: {len(receptor_filtered_df)}")
+    def __getstate__(self):
+        # Worker processes only extract logs, so the index is not shipped to them
+        state = self.__dict__.copy()
+        state["_filter_index"] = None
+        return state
 
-        testing_code_filtered_df = receptor_filtered_df[receptor_filtered_df["Testing Code"] == filter_params["testing_code"]]
-        print(f"After applying testing code filter (Testing Code: {filter_params['testing_code']}), row count: {len(testing_code_filtered_df)}")
-
-        coating_code_filtered_df = testing_code_filtered_df[testing_code_filtered_df["Coating Code"] == filter_params["coating_code"]]
-        print(f"After applying coating code filter (Coating Code: {filter_params['coating_code']}), row count: {len(coating_code_filtered_df)}")
+    def load_and_filter_data(self, filter_params):
+        log("Loading and filtering data...")
+        start_time = time.time()
 
-        target_analyte_filtered_df = coating_code_filtered_df[coating_code_filtered_df["Target Analyte"] == filter_params["target_analyte"]]
-        print(f"After applying target analyte filter (Target Analyte: {filter_params['target_analyte']}), row count: {len(target_analyte_filtered_df)}")
+        # Load the Testing Database sheet (shared, cached copy)
+        df = load_testing_database(self.testing_file)
+        log(f"Initial DataFrame row count: {len(df)}")
 
-        run_result_classification_filtered_df = target_analyte_filtered_df[
-            target_analyte_filtered_df["Run Result Classification"].isin(filter_params["run_result_classification"]) |
-            target_analyte_filtered_df["Run Result Classification"].isnull()
-        ]
-        print(f"After applying run result classification filter (Run Result Classification: {filter_params['run_result_classification']}), row count: {len(run_result_classification_filtered_df)}")
+        # Resolve every filter as a single intersection of precomputed group indexes
+        selected_df = self.filter_index(df).select(filter_params)
+        log(f"After applying filters {filter_params}, row count: {len(selected_df)}")
 
         # Extract the desired columns into a new DataFrame
-        final_df = run_result_classification_filtered_df[["Log Filename", "Analyte Concentration"]].dropna()
-        print(f"Final DataFrame row count: {len(final_df)}")
+        final_df = selected_df[["Log Filename", "Analyte Concentration"]].dropna().copy()
+        log(f"Final DataFrame row count: {len(final_df)}")
 
         # Clean the log filenames
         final_df["Cleaned Log Filename"] = final_df["Log Filename"].apply(self.clean_log_filename)
 
         end_time = time.time()
-        print(f"Data loaded and filtered in {end_time - start_time:.2f} seconds.")
+        record("load_and_filter_data", end_time - start_time, rows=len(final_df))
+        log(f"Data loaded and filtered in {end_time - start_time:.2f} seconds.")
         return final_df
 
     def clean_log_filename(self, log_filename):
@@ -48,13 +56,20 @@ class DataProcessor:
         return f"{cleaned_name}_dlog_recalc.xlsx"
 
     def extract_filtered_data(self, file_path):
-        print(f"Extracting data from file: {file_path}")
+        t_min, t_max = self.time_window
+        if self.trace_cache is not None:
+            cached = self.trace_cache.get(file_path, t_min, t_max)
+            if cached is not None:
+                log(f"Trace cache hit for file: {file_path}", "debug")
+                return Trace(file_path, *cached, cached=True)
+
+        log(f"Extracting data from file: {file_path}", "debug")
         try:
-            df = pd.read_excel(file_path)
-            filtered_df = df[(df["Time from Start (sec)"] >= 0) & (df["Time from Start (sec)"] < 600)]
-            print(f"Filtered data has {len(filtered_df)} rows")
-            filtered_df["File Name"] = file_path  # Add file name to the DataFrame
-            return filtered_df[["Time from Start (sec)", "UWA_BaselineCorr_2", "File Name"]]
+            time_values, uwa_values = read_trace(file_path, t_min, t_max)
+            log(f"Filtered data has {len(time_values)} rows", "debug")
+            if self.trace_cache is not None:
+                self.trace_cache.put(file_path, t_min, t_max, time_values, uwa_values)
+            return Trace(file_path, time_values, uwa_values)
         except Exception as e:
-            print(f"Error processing file {file_path}: {e}")
-            return pd.DataFrame()
+            log(f"Error processing file {file_path}: {e}")
+            return None
@@ -0,0 +1,131 @@
+import os
+import json
+import hashlib
+import threading
+from cache_paths import cache_dir
+from instrumentation import log, count
+
+SHEET_NAME = "Testing Database"
+
+# Columns offered in the filter window; their distinct values are kept in the cache's meta JSON
+FILTER_COLUMNS = ("Receptor", "Testing Code", "Coating Code", "Target Analyte", "Run Result Classification")
+
+def sorted_values(values):
+    try:
+        return sorted(values)
+    except TypeError:
+        return sorted(values, key=str)  # Mixed-type Excel column
+
+def filter_values_from_df(df):
+    values = {column: sorted_values(df[column].dropna().unique().tolist()) for column in FILTER_COLUMNS}
+    values["Coating Code"] = sorted(df["Coating Code"].dropna().astype(str).unique().tolist())
+    return values
+
+class DatabaseCache:
+    # One in-memory copy per (path, mtime, size), shared by every caller in the process
+    _memory = {}
+    _lock = threading.Lock()
+
+    def __init__(self, file_path, sheet_name=SHEET_NAME, cache_root=None):
+        self.file_path = os.path.abspath(file_path)
+        self.sheet_name = sheet_name
+        self.cache_root = cache_root or cache_dir("database")
+        name_hash = hashlib.sha1(f"{self.file_path}|{self.sheet_name}".encode("utf-8")).hexdigest()[:16]
+        self.data_path = os.path.join(self.cache_root, f"{name_hash}.parquet")
+        self.pickle_path = os.path.join(self.cache_root, f"{name_hash}.pkl")
+        self.meta_path = os.path.join(self.cache_root, f"{name_hash}.json")
+
+    def source_key(self):
+        stat = os.stat(self.file_path)
+        return (self.file_path, self.sheet_name, stat.st_mtime_ns, stat.st_size)
+
+    def load(self):
+        key = self.source_key()
+        with self._lock:
+            if key in self._memory:
+                return self._memory[key]
+
+            df = self._read_disk_cache(key)
+            if df is None:
+                import pandas as pd  # Deferred so the filter window can open without pandas
+
+                count("database_cache_misses")
+                log(f"Database cache miss, parsing {self.file_path}...")
+                df = pd.read_excel(self.file_path, sheet_name=self.sheet_name)
+                self._write_disk_cache(key, df)
+            else:
+                count("database_cache_hits")
+                log(f"Loaded Testing Database from cache ({len(df)} rows).")
+
+            # Drop stale copies of the same workbook before keeping the new one
+            for old_key in [k for k in self._memory if k[:2] == key[:2]]:
+                del self._memory[old_key]
+            self._memory[key] = df
+            return df
+
+    def filter_values(self):
+        # Distinct filter column values, read from the meta JSON alone when it is current
+        meta = self._read_meta(self.source_key())
+        if meta is not None and "filter_values" in meta:
+            return meta["filter_values"]
+        values = filter_values_from_df(self.load())
+        meta = self._read_meta(self.source_key())
+        if meta is not None:
+            meta["filter_values"] = values
+            self._write_meta(meta)
+        return values
+
+    def _read_meta(self, key):
+        if not os.path.exists(self.meta_path):
+            return None
+        try:
+            with open(self.meta_path, "r") as f:
+                meta = json.load(f)
+        except Exception as e:
+            log(f"Ignoring unreadable database cache: {e}")
+            return None
+        if meta.get("mtime_ns") != key[2] or meta.get("size") != key[3]:
+            return None
+        return meta
+
+    def _write_meta(self, meta):
+        tmp_path = f"{self.meta_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, self.meta_path)
+
+    def _read_disk_cache(self, key):
+        meta = self._read_meta(key)
+        if meta is None:
+            return None
+        import pandas as pd
+
+        try:
+            if meta.get("format") == "parquet":
+                return pd.read_parquet(self.data_path)
+            return pd.read_pickle(self.pickle_path)
+        except Exception as e:
+            log(f"Ignoring unreadable database cache: {e}")
+            return None
+
+    def _write_disk_cache(self, key, df):
+        try:
+            df.to_parquet(self.data_path, index=False)
+            cache_format = "parquet"
+        except Exception:
+            # Mixed-type Excel columns (or a missing pyarrow) can defeat Parquet; pickle handles anything
+            df.to_pickle(self.pickle_path)
+            cache_format = "pickle"
+
+        meta = {"source": key[0], "sheet_name": key[1], "mtime_ns": key[2], "size": key[3], "format": cache_format}
+        try:
+            meta["filter_values"] = filter_values_from_df(df)
+        except (KeyError, TypeError) as e:
+            log(f"Could not cache filter values: {e}")
+        self._write_meta(meta)
+
+def load_testing_database(file_path, sheet_name=SHEET_NAME):
+    return DatabaseCache(file_path, sheet_name).load()
+
+def load_filter_values(file_path, sheet_name=SHEET_NAME):
+    return DatabaseCache(file_path, sheet_name).filter_values()
@@ -0,0 +1,59 @@
+import numpy as np
+from openpyxl import load_workbook
+
+TIME_COLUMN = "Time from Start (sec)"
+UWA_COLUMN = "UWA_BaselineCorr_2"
+
+class Trace:
+    __slots__ = ("file_path", "time", "values", "cached")
+
+    def __init__(self, file_path, time, values, cached=False):
+        self.file_path = file_path
+        self.time = time
+        self.values = values
+        self.cached = cached  # True when served from the trace cache
+
+    def __len__(self):
+        return len(self.time)
+
+def to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+def read_trace(file_path, t_min=0, t_max=600, time_column=TIME_COLUMN, value_column=UWA_COLUMN):
+    # Stream the first sheet row by row and stop at the first time >= t_max.
+    # Acquisition logs are written in time order, so nothing after that row is needed.
+    workbook = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        sheet = workbook.worksheets[0]
+        header = next(sheet.iter_rows(min_row=1, max_row=1, values_only=True), ())
+        header = [str(name).strip() if name is not None else None for name in header]
+        if time_column not in header or value_column not in header:
+            raise ValueError(f"Missing '{time_column}' or '{value_column}' column")
+
+        time_index = header.index(time_column)
+        value_index = header.index(value_column)
+        first = min(time_index, value_index)
+        last = max(time_index, value_index)
+        time_index -= first
+        value_index -= first
+
+        times = []
+        values = []
+        for row in sheet.iter_rows(min_row=2, min_col=first + 1, max_col=last + 1, values_only=True):
+            t = to_float(row[time_index])
+            if t is None or t != t:
+                continue
+            if t >= t_max:
+                break
+            if t < t_min:
+                continue
+            value = to_float(row[value_index])
+            times.append(t)
+            values.append(np.nan if value is None else value)
+    finally:
+        workbook.close()
+
+    return np.array(times, dtype=float), np.array(values, dtype=float)
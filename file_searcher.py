@@ -1,27 +1,119 @@
 import os
-import glob
+import pickle
+import hashlib
+from cache_paths import cache_dir
+from instrumentation import log, span
+
+CATALOGUE_VERSION = 1
 
 class FileSearcher:
-    def __init__(self, base_dir):
+    def __init__(self, base_dir, catalogue_path=None):
         self.base_dir = base_dir
+        if catalogue_path is None:
+            name_hash = hashlib.sha1(os.path.abspath(base_dir).encode("utf-8")).hexdigest()[:16]
+            catalogue_path = os.path.join(cache_dir("catalogue"), f"{name_hash}.pkl")
+        self.catalogue_path = catalogue_path
+        self.directories = {}  # dir path -> (mtime_ns, xlsx file names, subdirectory names)
+        self.index = {}  # basename -> list of full paths
         self.preloaded_files = self.preload_files()
 
+    def load_catalogue(self):
+        try:
+            with open(self.catalogue_path, "rb") as f:
+                catalogue = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return {}
+        if catalogue.get("version") != CATALOGUE_VERSION or catalogue.get("base_dir") != self.base_dir:
+            return {}
+        return catalogue["directories"]
+
+    def save_catalogue(self):
+        catalogue = {"version": CATALOGUE_VERSION, "base_dir": self.base_dir, "directories": self.directories}
+        tmp_path = f"{self.catalogue_path}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                pickle.dump(catalogue, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self.catalogue_path)
+        except OSError as e:
+            log(f"Could not save file catalogue: {e}")
+
+    def scan_directory(self, dir_path):
+        files = []
+        subdirs = []
+        with os.scandir(dir_path) as entries:
+            for entry in entries:
+                # Hidden entries are skipped, matching glob's behaviour
+                if entry.name.startswith("."):
+                    continue
+                try:
+                    if entry.is_dir():
+                        subdirs.append(entry.name)
+                    elif os.path.normcase(entry.name).endswith(".xlsx") and entry.is_file():
+                        files.append(entry.name)
+                except OSError:
+                    continue
+        return files, subdirs
+
+    def refresh_catalogue(self):
+        previous = self.load_catalogue()
+        directories = {}
+        scanned = 0
+        reused = 0
+
+        stack = [self.base_dir]
+        while stack:
+            dir_path = stack.pop()
+            try:
+                mtime = os.stat(dir_path).st_mtime_ns
+            except OSError:
+                continue
+
+            # A directory's mtime only changes when its own entries change, so an
+            # unchanged directory reuses its listing; subdirectories are still checked
+            cached = previous.get(dir_path)
+            if cached is not None and cached[0] == mtime:
+                files, subdirs = cached[1], cached[2]
+                reused += 1
+            else:
+                try:
+                    files, subdirs = self.scan_directory(dir_path)
+                except OSError as e:
+                    log(f"Could not scan {dir_path}: {e}")
+                    continue
+                scanned += 1
+
+            directories[dir_path] = (mtime, files, subdirs)
+            stack.extend(os.path.join(dir_path, name) for name in subdirs)
+
+        log(f"Catalogue refreshed: {scanned} directories rescanned, {reused} unchanged.")
+        self.directories = directories
+        if scanned or len(previous) != len(directories):
+            self.save_catalogue()
+
+    def build_index(self):
+        index = {}
+        for dir_path, (_, files, _) in self.directories.items():
+            for name in files:
+                index.setdefault(name, []).append(os.path.join(dir_path, name))
+        self.index = index
+
     def preload_files(self):
-        print(f"Preloading files from {self.base_dir}...")
-        search_path = os.path.join(self.base_dir, '**', '*.xlsx')
-        print(f"Using search pattern: {search_path}")
-        
-        preloaded_files = glob.glob(search_path, recursive=True)
+        log(f"Preloading files from {self.base_dir}...")
+        with span("catalogue_refresh", base_dir=self.base_dir):
+            self.refresh_catalogue()
+            self.build_index()
+
+        preloaded_files = [path for paths in self.index.values() for path in paths]
         
         if not preloaded_files:
-            print(f"No files found with pattern: {search_path}")
+            log(f"No .xlsx files found under {self.base_dir}")
         else:
-            print(f"Found {len(preloaded_files)} files.")
+            log(f"Found {len(preloaded_files)} files.")
         
         return preloaded_files
 
     def search_files(self, pattern):
-        print(f"Searching for files with pattern: {pattern}")
-        matched_files = [f for f in self.preloaded_files if os.path.basename(f) == pattern]
-        print(f"Found {len(matched_files)} files matching pattern: {pattern}")
+        log(f"Searching for files with pattern: {pattern}", "debug")
+        matched_files = list(self.index.get(pattern, []))
+        log(f"Found {len(matched_files)} files matching pattern: {pattern}", "debug")
         return matched_files
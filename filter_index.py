@@ -0,0 +1,63 @@
+from functools import reduce
+import numpy as np
+import pandas as pd
+
+EMPTY = np.array([], dtype=np.intp)
+
+# filter_params key -> Testing Database column
+INDEXED_COLUMNS = {
+    "receptor": "Receptor",
+    "testing_code": "Testing Code",
+    "coating_code": "Coating Code",
+    "target_analyte": "Target Analyte",
+}
+
+class FilterIndex:
+    def __init__(self, df):
+        self.df = df
+        self.keys = {}
+        self.groups = {}
+
+        for param, column in INDEXED_COLUMNS.items():
+            values = df[column]
+            if param == "receptor":
+                # Receptor is matched case- and whitespace-insensitively
+                values = values.astype("string").str.strip().str.lower()
+            key = pd.Categorical(values)
+            self.keys[param] = key
+            self.groups[param] = self.group_positions(key)
+
+        classification = df["Run Result Classification"]
+        self.classification_groups = self.group_positions(pd.Categorical(classification))
+        self.classification_null = np.flatnonzero(classification.isnull().to_numpy())
+
+    def group_positions(self, categorical):
+        codes = categorical.codes
+        order = np.argsort(codes, kind="stable")
+        boundaries = np.flatnonzero(np.diff(codes[order])) + 1
+        positions = {}
+        for chunk in np.split(order, boundaries):
+            if chunk.size and codes[chunk[0]] >= 0:  # -1 is the code for missing values
+                positions[categorical.categories[codes[chunk[0]]]] = chunk
+        return positions
+
+    def positions_for(self, param, value):
+        if param == "receptor":
+            value = str(value).lower()
+        return self.groups[param].get(value, EMPTY)
+
+    def classification_positions(self, classifications):
+        # Rows without a classification are always kept, as before
+        selected = [self.classification_groups.get(value, EMPTY) for value in classifications if value is not None]
+        return np.union1d(reduce(np.union1d, selected, EMPTY), self.classification_null)
+
+    def lookup(self, filter_params):
+        candidates = [self.positions_for(param, filter_params[param]) for param in INDEXED_COLUMNS]
+        candidates.append(self.classification_positions(filter_params["run_result_classification"]))
+
+        # Intersect starting from the smallest group so the work stays proportional to the result
+        candidates.sort(key=len)
+        return reduce(lambda a, b: np.intersect1d(a, b, assume_unique=True), candidates)
+
+    def select(self, filter_params):
+        return self.df.iloc[self.lookup(filter_params)]
@@ -2,9 +2,9 @@ import tkinter as tk
 from tkinter import ttk, MULTIPLE
 
 class FilterWindow:
-    def __init__(self, root, df, filter_params, update_callback):
+    def __init__(self, root, filter_values, filter_params, update_callback):
         self.root = root
-        self.df = df
+        self.filter_values = filter_values  # column -> sorted distinct values, from load_filter_values()
         self.filter_params = filter_params
         self.update_callback = update_callback
 
@@ -16,7 +16,7 @@ class FilterWindow:
         receptor_label = ttk.Label(self.root, text="Receptor")
         receptor_label.grid(row=0, column=0, padx=10, pady=5, sticky="e")
         self.receptor_var = tk.StringVar(value=self.filter_params["receptor"])
-        receptor_values = sorted(self.df["Receptor"].dropna().unique().tolist())
+        receptor_values = self.filter_values["Receptor"]
         self.receptor_menu = ttk.Combobox(self.root, textvariable=self.receptor_var, values=receptor_values)
         self.receptor_menu.grid(row=0, column=1, padx=10, pady=5)
 
@@ -24,7 +24,7 @@ class FilterWindow:
         testing_code_label = ttk.Label(self.root, text="Testing Code")
         testing_code_label.grid(row=1, column=0, padx=10, pady=5, sticky="e")
         self.testing_code_var = tk.StringVar(value=self.filter_params["testing_code"])
-        testing_code_values = sorted(self.df["Testing Code"].dropna().unique().tolist())
+        testing_code_values = self.filter_values["Testing Code"]
         self.testing_code_menu = ttk.Combobox(self.root, textvariable=self.testing_code_var, values=testing_code_values)
         self.testing_code_menu.grid(row=1, column=1, padx=10, pady=5)
 
@@ -32,7 +32,7 @@ class FilterWindow:
         coating_code_label = ttk.Label(self.root, text="Coating Code")
         coating_code_label.grid(row=2, column=0, padx=10, pady=5, sticky="e")
         self.coating_code_var = tk.StringVar(value=self.filter_params["coating_code"])  # Change from IntVar to StringVar
-        coating_code_values = sorted(self.df["Coating Code"].dropna().astype(str).unique().tolist())
+        coating_code_values = self.filter_values["Coating Code"]
         self.coating_code_menu = ttk.Combobox(self.root, textvariable=self.coating_code_var, values=coating_code_values)
         self.coating_code_menu.grid(row=2, column=1, padx=10, pady=5)
 
@@ -40,7 +40,7 @@ class FilterWindow:
         target_analyte_label = ttk.Label(self.root, text="Target Analyte")
         target_analyte_label.grid(row=3, column=0, padx=10, pady=5, sticky="e")
         self.target_analyte_var = tk.StringVar(value=self.filter_params["target_analyte"])
-        target_analyte_values = sorted(self.df["Target Analyte"].dropna().unique().tolist())
+        target_analyte_values = self.filter_values["Target Analyte"]
         self.target_analyte_menu = ttk.Combobox(self.root, textvariable=self.target_analyte_var, values=target_analyte_values)
         self.target_analyte_menu.grid(row=3, column=1, padx=10, pady=5)
 
@@ -48,8 +48,8 @@ class FilterWindow:
         run_result_classification_label = ttk.Label(self.root, text="Run Result Classification")
         run_result_classification_label.grid(row=4, column=0, padx=10, pady=5, sticky="e")
 
-        # Dynamically populate the listbox with unique values from the Excel sheet
-        run_result_classification_values = sorted(self.df["Run Result Classification"].dropna().unique().tolist())
+        # Populate the listbox with the unique values from the Testing Database
+        run_result_classification_values = self.filter_values["Run Result Classification"]
         self.run_result_classification_listbox = tk.Listbox(self.root, selectmode=MULTIPLE)
         for item in run_result_classification_values:
             self.run_result_classification_listbox.insert(tk.END, item)
@@ -0,0 +1,97 @@
+import numpy as np
+from scipy.optimize import curve_fit
+from batch_fitting import safe_exp, sigmoid
+
+def five_parameter_logistic(x, L, x0, k, b, s):
+    # 4PL with an asymmetry exponent s; s = 1 reduces to the 4PL
+    return L / (1 + safe_exp(-k * (x - x0))) ** s + b
+
+def exponential_association(x, A, r, b):
+    return b + A * (1 - safe_exp(-r * x))
+
+MODEL_PARAMETER_COUNTS = {"4PL": 4, "5PL": 5, "exponential": 3}
+
+def smoothed_profile(x, y, n_bins=50):
+    # Median of y in equal-width time bins; robust to noise and to many pooled replicates
+    edges = np.linspace(np.min(x), np.max(x), n_bins + 1)
+    bins = np.clip(np.digitize(x, edges) - 1, 0, n_bins - 1)
+    centers = []
+    medians = []
+    for i in range(n_bins):
+        in_bin = y[bins == i]
+        if in_bin.size:
+            centers.append((edges[i] + edges[i + 1]) / 2)
+            medians.append(np.median(in_bin))
+    return np.array(centers), np.array(medians)
+
+def data_driven_guess(x, y):
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    finite = np.isfinite(x) & np.isfinite(y)
+    x, y = x[finite], y[finite]
+    span = np.ptp(x) if x.size else 0.0
+    if x.size < 8 or span <= 0:
+        return [np.max(y) if y.size else 1.0, np.median(x) if x.size else 0.0, 1.0, np.min(y) if y.size else 0.0]
+
+    centers, medians = smoothed_profile(x, y)
+    edge = max(len(medians) // 10, 1)
+    b = np.median(medians[:edge])  # early plateau
+    top = np.median(medians[-edge:])  # late plateau
+    L = top - b
+    if L == 0:
+        return [np.max(y), np.median(x), 4 / span, np.min(y)]
+
+    # Midpoint: first time the smoothed curve crosses halfway between the plateaus
+    progress = (medians - b) / L
+    crossing = np.flatnonzero(progress >= 0.5)
+    x0 = centers[crossing[0]] if crossing.size else np.median(x)
+
+    # Slope at the midpoint gives k, since the 4PL slope there is L * k / 4
+    slope = np.gradient(medians, centers)[np.argmin(np.abs(centers - x0))]
+    k = 4 * slope / L
+    if not np.isfinite(k) or k <= 0:
+        k = 4 / span
+    return [L, x0, k, b]
+
+def aic(ssr, n_points, n_params):
+    ssr = max(ssr, np.finfo(float).tiny)
+    return n_points * np.log(ssr / n_points) + 2 * n_params
+
+def select_model(x, y, popt_4pl, maxfev=5000):
+    # Compares the 4PL fit against 5PL and exponential association fits by AIC
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    finite = np.isfinite(x) & np.isfinite(y)
+    x, y = x[finite], y[finite]
+    n = len(x)
+    candidates = {}
+    scores = {}
+    evaluations = {}
+    if not n:
+        return {"model": "4PL", "aic": {"4PL": np.nan}, "popt": {"4PL": np.asarray(popt_4pl)}, "nfev": evaluations}
+
+    ssr = float(np.sum((sigmoid(x, *popt_4pl) - y) ** 2))
+    candidates["4PL"] = np.asarray(popt_4pl)
+    scores["4PL"] = aic(ssr, n, 4)
+
+    L, x0, k, b = popt_4pl
+    starts = {
+        "5PL": (five_parameter_logistic, [L, x0, k, b, 1.0]),
+        "exponential": (exponential_association, [y[np.argmax(x)] - y[np.argmin(x)], max(k, 1e-6) / 2, y[np.argmin(x)]]),
+    }
+    for name, (model, p0) in starts.items():
+        if MODEL_PARAMETER_COUNTS[name] >= n:
+            continue  # Too few points (e.g. coarse bins) to fit, and AIC is meaningless there
+        try:
+            popt, _, info, _, _ = curve_fit(model, x, y, p0, maxfev=maxfev, full_output=True)
+        except (RuntimeError, ValueError, TypeError):
+            continue
+        ssr = float(np.sum((model(x, *popt) - y) ** 2))
+        candidates[name] = popt
+        scores[name] = aic(ssr, n, MODEL_PARAMETER_COUNTS[name])
+        evaluations[name] = int(info["nfev"])
+
+    best = min(scores, key=scores.get)
+    return {"model": best, "aic": scores, "popt": candidates, "nfev": evaluations}
+
+MODEL_FUNCTIONS = {"4PL": sigmoid, "5PL": five_parameter_logistic, "exponential": exponential_association}
@@ -0,0 +1,72 @@
+import numpy as np
+from batch_fitting import sigmoid
+from kinetics import kinetic_descriptors, descriptors_for
+
+class ConcentrationFit:
+    def __init__(self, concentration, group, popt=None, pcov=None, run_fits=None, n_fit_points=1000,
+                 x_range=None, file_paths=None, descriptors=None):
+        self.concentration = concentration
+        self.group = group  # TraceGroup with every run of this concentration (None when restored from a manifest)
+        self.x_range = x_range if group is None else (float(np.min(group.time)), float(np.max(group.time)))
+        self.file_paths = list(file_paths or []) if group is None else list(group.file_paths)
+        self.popt = popt
+        self.pcov = pcov
+        self.run_fits = run_fits or {}  # run index -> popt, when runs are fitted individually
+        self.x_fit = None
+        self.y_fit = None
+        self.inflection_time = None
+        self.descriptors = {}
+        self.rmse = None
+        self.nfev = None  # Objective evaluations spent on this fit
+        self.model_selection = None  # select_model() result when model selection is enabled
+        self.binned = None  # BinnedCurve the fit was made on, when binning is enabled
+        self.bootstrap = None  # BootstrapResult with confidence intervals and band, when bootstrapping is enabled
+        self.n_points = None if group is None else group.n_points
+
+        if popt is not None:
+            self.x_fit = np.linspace(self.x_range[0], self.x_range[1], n_fit_points)
+            self.y_fit = sigmoid(self.x_fit, *popt)
+
+            # Closed-form kinetic descriptors; the marked time is the minimum of the second derivative
+            self.descriptors = descriptors if descriptors is not None else descriptors_for(kinetic_descriptors(popt), 0)
+            self.inflection_time = self.descriptors["second_derivative_min"]
+
+            if group is not None:
+                # Run by run, so a memmapped group is paged through rather than materialised
+                squared_error, n = 0.0, 0
+                for time_values, uwa_values in (group.run(i) for i in range(len(group))):
+                    residuals = sigmoid(time_values, *popt) - uwa_values
+                    finite = np.isfinite(residuals)
+                    squared_error += float(np.sum(residuals[finite] ** 2))
+                    n += int(np.count_nonzero(finite))
+                self.rmse = float(np.sqrt(squared_error / n)) if n else np.nan
+
+    @property
+    def succeeded(self):
+        return self.popt is not None
+
+    @property
+    def file_names(self):
+        return self.file_paths
+
+class FitResults:
+    def __init__(self, fits, timestamp):
+        self.fits = fits
+        self.timestamp = timestamp
+        self.partial = False  # Set when a cancel skipped extraction, bootstrap replicates or plots
+
+    def __iter__(self):
+        return iter(self.fits)
+
+    def __len__(self):
+        return len(self.fits)
+
+    def get(self, concentration):
+        for fit in self.fits:
+            if fit.concentration == concentration:
+                return fit
+        return None
+
+    def successful(self):
+        # Sorted by concentration to ensure an ordinal relationship
+        return sorted((fit for fit in self.fits if fit.succeeded), key=lambda fit: fit.concentration)
@@ -0,0 +1,205 @@
+import os
+import sys
+import json
+import time
+import sqlite3
+import argparse
+import numpy as np
+import pandas as pd
+from cache_paths import data_file
+from instrumentation import log
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS analyses (
+    id INTEGER PRIMARY KEY,
+    created_at TEXT NOT NULL,
+    filter_dir TEXT,
+    receptor TEXT,
+    testing_code TEXT,
+    coating_code TEXT,
+    target_analyte TEXT,
+    filter_params TEXT
+);
+CREATE TABLE IF NOT EXISTS fits (
+    id INTEGER PRIMARY KEY,
+    analysis_id INTEGER NOT NULL REFERENCES analyses(id),
+    concentration,
+    succeeded INTEGER NOT NULL,
+    L REAL, x0 REAL, k REAL, b REAL,
+    pcov TEXT,
+    inflection_time REAL,
+    rmse REAL,
+    n_points INTEGER,
+    n_runs INTEGER
+);
+CREATE TABLE IF NOT EXISTS fit_descriptors (
+    fit_id INTEGER NOT NULL REFERENCES fits(id),
+    name TEXT NOT NULL,
+    value REAL
+);
+CREATE TABLE IF NOT EXISTS fit_inputs (
+    fit_id INTEGER NOT NULL REFERENCES fits(id),
+    file_path TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_analyses_filter ON analyses (receptor, testing_code, coating_code, target_analyte, created_at);
+CREATE INDEX IF NOT EXISTS idx_analyses_created ON analyses (created_at);
+CREATE INDEX IF NOT EXISTS idx_fits_analysis ON fits (analysis_id);
+CREATE INDEX IF NOT EXISTS idx_fits_concentration ON fits (concentration);
+CREATE INDEX IF NOT EXISTS idx_fit_inputs_fit ON fit_inputs (fit_id);
+CREATE INDEX IF NOT EXISTS idx_fit_descriptors_fit ON fit_descriptors (fit_id, name);
+"""
+
+# Columns added after the first release; existing stores are upgraded in place
+ADDED_COLUMNS = [
+    ("fits", "nfev", "INTEGER"),
+    ("fits", "model", "TEXT"),
+]
+
+FILTER_COLUMNS = ("receptor", "testing_code", "coating_code", "target_analyte")
+
+def to_db_value(value):
+    if value is None:
+        return None
+    value = value.item() if hasattr(value, "item") else value
+    if isinstance(value, float) and not np.isfinite(value):
+        return None
+    return value
+
+class FitStore:
+    def __init__(self, path=None):
+        self.path = path or data_file("fit_store.sqlite")
+        with self.connect() as connection:
+            connection.executescript(SCHEMA)
+            for table, column, column_type in ADDED_COLUMNS:
+                existing = {row[1] for row in connection.execute(f"PRAGMA table_info({table})")}
+                if column not in existing:
+                    connection.execute(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}")
+
+    def connect(self):
+        # One short-lived connection per call keeps the store usable from worker threads
+        connection = sqlite3.connect(self.path, timeout=30)
+        connection.execute("PRAGMA foreign_keys = ON")
+        return connection
+
+    def record(self, fits, filter_params=None, filter_dir=None):
+        filter_params = filter_params or {}
+        created_at = time.strftime("%Y-%m-%d %H:%M:%S")
+        with self.connect() as connection:
+            cursor = connection.execute(
+                "INSERT INTO analyses (created_at, filter_dir, receptor, testing_code, coating_code, target_analyte, filter_params) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (created_at, filter_dir, *(None if filter_params.get(c) is None else str(filter_params[c]) for c in FILTER_COLUMNS),
+                 json.dumps(filter_params, default=str))
+            )
+            analysis_id = cursor.lastrowid
+
+            for fit in fits:
+                popt = [None] * 4 if fit.popt is None else [to_db_value(p) for p in fit.popt]
+                pcov = None if fit.pcov is None else json.dumps(np.asarray(fit.pcov).tolist())
+                cursor = connection.execute(
+                    "INSERT INTO fits (analysis_id, concentration, succeeded, L, x0, k, b, pcov, inflection_time, rmse, n_points, n_runs, "
+                    "nfev, model) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (analysis_id, to_db_value(fit.concentration), int(fit.succeeded), *popt, pcov,
+                     to_db_value(fit.inflection_time), to_db_value(fit.rmse), fit.n_points, len(fit.file_paths),
+                     fit.nfev, None if fit.model_selection is None else fit.model_selection["model"])
+                )
+                aic_scores = {} if fit.model_selection is None else fit.model_selection["aic"]
+                connection.executemany(
+                    "INSERT INTO fit_descriptors (fit_id, name, value) VALUES (?, ?, ?)",
+                    [(cursor.lastrowid, name, to_db_value(value)) for name, value in fit.descriptors.items()] +
+                    [(cursor.lastrowid, f"aic_{name}", to_db_value(value)) for name, value in aic_scores.items()]
+                )
+                connection.executemany(
+                    "INSERT INTO fit_inputs (fit_id, file_path) VALUES (?, ?)",
+                    [(cursor.lastrowid, file_path) for file_path in fit.file_paths]
+                )
+        log(f"Recorded {len(fits)} fits in the fit store (analysis {analysis_id}).")
+        return analysis_id
+
+    def history(self, receptor=None, testing_code=None, coating_code=None, target_analyte=None,
+                concentration=None, since=None, until=None, successful_only=True):
+        # Every filter is optional; dates compare against created_at ("YYYY-MM-DD[ HH:MM:SS]")
+        clauses = []
+        params = []
+        for column, value in zip(FILTER_COLUMNS, (receptor, testing_code, coating_code, target_analyte)):
+            if value is not None:
+                clauses.append(f"a.{column} = ?")
+                params.append(str(value))
+        if concentration is not None:
+            clauses.append("f.concentration = ?")
+            params.append(to_db_value(concentration))
+        if since is not None:
+            clauses.append("a.created_at >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("a.created_at <= ?")
+            params.append(until)
+        if successful_only:
+            clauses.append("f.succeeded = 1")
+
+        query = (
+            "SELECT f.id AS fit_id, a.id AS analysis_id, a.created_at, a.receptor, a.testing_code, a.coating_code, "
+            "a.target_analyte, f.concentration, f.L, f.x0, f.k, f.b, f.inflection_time, f.rmse, f.n_points, f.n_runs, f.nfev, f.model "
+            "FROM fits f JOIN analyses a ON a.id = f.analysis_id"
+        )
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += " ORDER BY a.created_at, f.concentration"
+
+        with self.connect() as connection:
+            return pd.read_sql_query(query, connection, params=params)
+
+    def descriptors(self, fit_ids):
+        # Kinetic descriptors (t10, t50, max_slope, ...) as one row per fit
+        fit_ids = [int(fit_id) for fit_id in fit_ids]
+        if not fit_ids:
+            return pd.DataFrame(columns=["fit_id"])
+        placeholders = ", ".join("?" * len(fit_ids))
+        with self.connect() as connection:
+            rows = pd.read_sql_query(
+                f"SELECT fit_id, name, value FROM fit_descriptors WHERE fit_id IN ({placeholders})", connection, params=fit_ids
+            )
+        return rows.pivot(index="fit_id", columns="name", values="value").reset_index()
+
+    def covariance(self, fit_id):
+        with self.connect() as connection:
+            row = connection.execute("SELECT pcov FROM fits WHERE id = ?", (fit_id,)).fetchone()
+        if row is None or row[0] is None:
+            return None
+        return np.array(json.loads(row[0]))
+
+    def inputs(self, fit_id):
+        with self.connect() as connection:
+            rows = connection.execute("SELECT file_path FROM fit_inputs WHERE fit_id = ?", (fit_id,)).fetchall()
+        return [row[0] for row in rows]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Query stored sigmoid fits.")
+    parser.add_argument("--store", default=None, help="SQLite fit store (defaults to the user data directory)")
+    parser.add_argument("--receptor")
+    parser.add_argument("--testing-code")
+    parser.add_argument("--coating-code")
+    parser.add_argument("--target-analyte")
+    parser.add_argument("--concentration", type=float)
+    parser.add_argument("--since", help="Earliest date, e.g. 2024-01-31")
+    parser.add_argument("--until", help="Latest date")
+    parser.add_argument("--descriptors", action="store_true", help="Include kinetic descriptors (t10, t50, max_slope, ...)")
+    parser.add_argument("--csv", help="Write the results to this CSV instead of printing them")
+    args = parser.parse_args(argv)
+
+    store = FitStore(args.store)
+    history = store.history(
+        receptor=args.receptor, testing_code=args.testing_code, coating_code=args.coating_code,
+        target_analyte=args.target_analyte, concentration=args.concentration, since=args.since, until=args.until
+    )
+    if args.descriptors:
+        history = history.merge(store.descriptors(history["fit_id"]), on="fit_id", how="left")
+    if args.csv:
+        history.to_csv(args.csv, index=False)
+        print(f"{len(history)} fits written to {args.csv}")
+    else:
+        print(history.to_string(index=False))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
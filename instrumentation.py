@@ -0,0 +1,141 @@
+import os
+import sys
+import json
+import time
+import threading
+from contextlib import nullcontext
+
+VERBOSITY_LEVELS = {"quiet": 0, "info": 1, "debug": 2}
+
+# Shared no-op context so disabled spans allocate nothing
+NULL_SPAN = nullcontext()
+
+class Span:
+    __slots__ = ("telemetry", "name", "attrs", "start")
+
+    def __init__(self, telemetry, name, attrs):
+        self.telemetry = telemetry
+        self.name = name
+        self.attrs = attrs
+        self.start = None
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.attrs["error"] = exc_type.__name__
+        self.telemetry.record(self.name, time.perf_counter() - self.start, **self.attrs)
+        return False
+
+class Telemetry:
+    def __init__(self, enabled=False, trace_path=None, verbosity="info"):
+        if verbosity not in VERBOSITY_LEVELS:
+            raise ValueError(f"Unknown verbosity {verbosity!r}, expected one of {list(VERBOSITY_LEVELS)}")
+        self.enabled = enabled
+        self.verbosity = VERBOSITY_LEVELS[verbosity]
+        self.trace_path = trace_path
+        self.stages = {}  # name -> [count, total seconds, max seconds]
+        self.counters = {}
+        self.lock = threading.Lock()
+        self.trace_file = None
+        self.origin = time.perf_counter()
+
+        if enabled and trace_path:
+            os.makedirs(os.path.dirname(os.path.abspath(trace_path)), exist_ok=True)
+            self.trace_file = open(trace_path, "a", buffering=1)
+
+    def log(self, message, level="info"):
+        if VERBOSITY_LEVELS[level] <= self.verbosity:
+            print(message)
+
+    def span(self, name, **attrs):
+        if not self.enabled:
+            return NULL_SPAN
+        return Span(self, name, attrs)
+
+    def record(self, name, seconds, **attrs):
+        # Also used directly for timings measured elsewhere (e.g. inside worker processes)
+        if not self.enabled:
+            return
+        with self.lock:
+            stage = self.stages.setdefault(name, [0, 0.0, 0.0])
+            stage[0] += 1
+            stage[1] += seconds
+            stage[2] = max(stage[2], seconds)
+            if self.trace_file is not None:
+                event = {"type": "span", "name": name, "t": round(time.perf_counter() - self.origin, 6),
+                         "duration": round(seconds, 6), "thread": threading.current_thread().name}
+                event.update(attrs)
+                self.trace_file.write(json.dumps(event, default=str) + "\n")
+
+    def count(self, name, n=1):
+        if not self.enabled:
+            return
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def summary(self):
+        lines = [f"{'stage':<28} {'count':>7} {'total (s)':>10} {'mean (s)':>9} {'max (s)':>9}"]
+        for name, (count, total, longest) in sorted(self.stages.items(), key=lambda item: -item[1][1]):
+            lines.append(f"{name:<28} {count:>7} {total:>10.3f} {total / count:>9.4f} {longest:>9.4f}")
+        if self.counters:
+            lines.append("")
+            lines.append(f"{'counter':<28} {'value':>7}")
+            for name, value in sorted(self.counters.items()):
+                lines.append(f"{name:<28} {value:>7}")
+        return "\n".join(lines)
+
+    def close(self):
+        if self.trace_file is not None:
+            with self.lock:
+                self.trace_file.write(json.dumps({"type": "counters", "counters": self.counters}) + "\n")
+                self.trace_file.close()
+                self.trace_file = None
+
+def peak_rss():
+    # Peak resident set size of this process in bytes; psutil is only needed on Windows
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+    except ImportError:
+        pass
+    try:
+        import psutil
+        info = psutil.Process().memory_info()
+        return getattr(info, "peak_wset", info.rss)
+    except ImportError:
+        return None
+
+def log_peak_rss():
+    peak = peak_rss()
+    if peak is None:
+        log("Peak RSS unavailable (install psutil).")
+    else:
+        log(f"Peak RSS: {peak / 1024 ** 2:.0f} MB")
+    return peak
+
+_telemetry = Telemetry()
+
+def configure(enabled=False, trace_path=None, verbosity="info"):
+    global _telemetry
+    _telemetry.close()
+    _telemetry = Telemetry(enabled=enabled, trace_path=trace_path, verbosity=verbosity)
+    return _telemetry
+
+def get_telemetry():
+    return _telemetry
+
+def log(message, level="info"):
+    _telemetry.log(message, level)
+
+def span(name, **attrs):
+    return _telemetry.span(name, **attrs)
+
+def count(name, n=1):
+    _telemetry.count(name, n)
+
+def record(name, seconds, **attrs):
+    _telemetry.record(name, seconds, **attrs)
@@ -0,0 +1,32 @@
+import numpy as np
+
+# For the 4PL, f'' = L k^2 s(1-s)(1-2s) has its extrema at k(x - x0) = +/- ln(2 + sqrt(3))
+SECOND_DERIVATIVE_OFFSET = np.log(2 + np.sqrt(3))
+DEFAULT_RESPONSE_LEVELS = (10, 50, 90)
+
+def kinetic_descriptors(popt, response_levels=DEFAULT_RESPONSE_LEVELS):
+    # popt is (4,) or (groups, 4) of L, x0, k, b; every descriptor comes back as an array with one value per group
+    popt = np.atleast_2d(np.asarray(popt, dtype=float))
+    L, x0, k, b = popt.T
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # The minimum of f'' sits after x0 for a rising curve (L > 0) and before it for a falling one
+        second_derivative_min = x0 + np.where(L >= 0, 1.0, -1.0) * SECOND_DERIVATIVE_OFFSET / k
+
+        descriptors = {
+            "inflection_point": x0,
+            "second_derivative_min": second_derivative_min,
+            "max_slope": L * k / 4,
+            "baseline": b,
+            "plateau": L + b,
+        }
+
+        # Time for the curve to cover X% of the way from baseline to plateau
+        for level in response_levels:
+            fraction = level / 100
+            descriptors[f"t{level:g}"] = x0 + np.log(fraction / (1 - fraction)) / k
+
+    return descriptors
+
+def descriptors_for(descriptors, index):
+    return {name: float(values[index]) for name, values in descriptors.items()}
@@ -57,6 +57,8 @@ def preload_files(base_dir):
     # Return the result if needed (this is a placeholder)
     return "Simulated File Search Result"
 
-# Example usage
-file_searcher = preload_files("/path/to/directory")
-print(file_searcher)  # Output the result
+if __name__ == "__main__":
+    # Example usage
+    file_searcher = preload_files("/path/to/directory")
+    print(file_searcher)  # Output the result
+
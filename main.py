@@ -1,137 +1,140 @@
 import tkinter as tk
 import threading
-import pandas as pd
 from file_searcher import FileSearcher
-from data_processor import DataProcessor
 from filter_window import FilterWindow
-from loading_window import LoadingWindow
 from progress_window import ProgressWindow
-from plotting import Plotting  # Ensure this import is correct
-import os
-import glob
-
-def preload_files(base_dir):
-    # Start the Tkinter root only when needed
-    preload_root = tk.Tk()
-    loading_window = LoadingWindow(preload_root)
-    
-    file_searcher = None  # Initialize as None
-
-    def run_preload():
-        nonlocal file_searcher
-        print("Starting file preloading...")
-        file_searcher = FileSearcher(base_dir=base_dir)
-        preload_root.after(0, loading_window.close)
-
-    # Start the preload process in a separate thread
-    preload_thread = threading.Thread(target=run_preload)
-    preload_thread.start()
-
-    # Main loop to keep the window open until the thread finishes
-    preload_root.mainloop()
-
-    preload_thread.join()  # Wait for the thread to finish before moving on
-
-    return file_searcher
-
-def process_file(file_path, concentration, data_processor):
-    filtered_data = data_processor.extract_filtered_data(file_path)
-    if not filtered_data.empty:
-        return concentration, filtered_data
-    return concentration, pd.DataFrame()
-
-def process_files(data_processor, file_searcher, final_df, base_dir, uwa_data_by_concentration, progress_window, filter_dir_name):
-    plotter = Plotting(base_dir, filter_dir_name)  # Initialize the Plotting class with filter_dir_name
-    total_files = final_df.shape[0]
-    completed = 0
-    
-    print(f"Total files to process: {total_files}")
-    
-    for idx, row in final_df.iterrows():
-        pattern = row["Cleaned Log Filename"]
-        print(f"Searching for files matching pattern: {pattern}")
-        
-        matched_files = file_searcher.search_files(pattern)
-        print(f"Found {len(matched_files)} files matching pattern: {pattern}")
-        
-        concentration = row["Analyte Concentration"]
-        for file_path in matched_files:
-            print(f"Processing file: {file_path}")
-            concentration, filtered_data = process_file(file_path, concentration, data_processor)
-            if not filtered_data.empty:
-                if concentration not in uwa_data_by_concentration:
-                    uwa_data_by_concentration[concentration] = []
-                uwa_data_by_concentration[concentration].append(filtered_data)
-            completed += 1
-            progress_window.update_progress(completed)
-    
-    print("All files processed. Computing and plotting results...")
-    plotter.compute_and_plot_individual(uwa_data_by_concentration)  # Use the instance to call the method
-    progress_window.processing_complete()
-
-def start_processing_in_thread(data_processor, file_searcher, final_df, base_dir, uwa_data_by_concentration, progress_window, filter_dir_name):
+from database_cache import load_testing_database, load_filter_values
+from pipeline import DEFAULT_FILTER_PARAMS, resolve_paths, build_filter_dir_name, collect_tasks, analyze_tasks
+import instrumentation
+
+# pandas, SciPy and Matplotlib are imported on first use (the filter window only needs the cached
+# column values), which also keeps spawned extraction workers quick to start
+
+# Worker count for log extraction (None uses every core); set EXTRACTION_USE_THREADS to avoid a process pool
+EXTRACTION_WORKERS = None
+EXTRACTION_USE_THREADS = False
+
+# Per-stage timing telemetry; setting TELEMETRY_TRACE_PATH also writes a JSONL trace
+TELEMETRY_ENABLED = False
+TELEMETRY_TRACE_PATH = None
+LOG_VERBOSITY = "info"  # "quiet", "info" or "debug"
+
+# Only refit and redraw concentrations whose log files changed since the last run
+INCREMENTAL_ANALYSIS = True
+
+# Which copy is analysed when a log file exists in several Box folders: "newest", "shortest_path" or "content_hash"
+CANONICAL_COPY_RULE = "newest"
+
+# Starting parameters: "data" derives them from the traces, "legacy" uses [max(y), median(x), 1, min(y)]
+INITIAL_GUESS = "data"
+# Also compare 4PL, 5PL and exponential association fits by AIC
+MODEL_SELECTION = False
+
+# Fit binned curves with this bin width in seconds (None fits every raw point), combining runs by "mean" or "median"
+BIN_WIDTH = None
+BIN_STATISTIC = "mean"
+# With BIN_WIDTH, also fit the raw points and write a binned vs full-resolution comparison CSV
+COMPARE_FULL_RESOLUTION = False
+
+# Stream traces into per-concentration buffers that spill to disk beyond this many MB (None keeps every trace in memory).
+# Needs BIN_WIDTH, since fits on raw points load every sample regardless.
+MEMORY_BUDGET_MB = None
+
+# Bootstrap replicates per concentration for confidence bands (0 disables), capped at BOOTSTRAP_TIME_BUDGET seconds
+BOOTSTRAP_REPLICATES = 0
+BOOTSTRAP_TIME_BUDGET = None
+
+# Log files read from Box ahead of the extraction workers at once (0 disables prefetching)
+PREFETCH_IN_FLIGHT = 8
+
+def start_warm_up(file_path, base_dir):
+    # Builds the file catalogue and loads the database while the user is still choosing filters
+    warm = {}
+
+    def run_warm_up():
+        try:
+            warm["file_searcher"] = FileSearcher(base_dir=base_dir)
+            load_testing_database(file_path)
+        except Exception as e:
+            warm["error"] = e
+
+    warm_thread = threading.Thread(target=run_warm_up, daemon=True)
+    warm_thread.start()
+    return warm_thread, warm
+
+def process_files(data_processor, file_searcher, final_df, base_dir, progress_window, filter_dir_name, filter_params):
+    # This runs off the Tk thread, so the window is only ever updated through its queue. Everything that
+    # can raise is inside the try, so the window always receives "done".
+    outcome = "complete"
+    try:
+        from plotting import Plotting
+        from parallel_extractor import ParallelExtractor
+        from prefetch import Prefetcher
+        from fit_store import FitStore
+
+        # Initialize the Plotting class with filter_dir_name; every fit is also recorded in the fit store
+        plotter = Plotting(base_dir, filter_dir_name, filter_params=dict(filter_params), fit_store=FitStore(),
+                           initial_guess=INITIAL_GUESS, model_selection=MODEL_SELECTION, bin_width=BIN_WIDTH,
+                           bin_statistic=BIN_STATISTIC, compare_full_resolution=COMPARE_FULL_RESOLUTION,
+                           bootstrap_replicates=BOOTSTRAP_REPLICATES, bootstrap_time_budget=BOOTSTRAP_TIME_BUDGET,
+                           bootstrap_workers=EXTRACTION_WORKERS, cancel_event=progress_window.cancel_event)
+
+        tasks = collect_tasks(final_df, file_searcher, CANONICAL_COPY_RULE, report_dir=plotter.overall_org_dir)
+        print(f"Total files to process: {len(tasks)}")
+
+        with ParallelExtractor(data_processor, workers=EXTRACTION_WORKERS, use_threads=EXTRACTION_USE_THREADS) as extractor, \
+                Prefetcher.for_processor(data_processor, max_in_flight=PREFETCH_IN_FLIGHT) as prefetcher:
+            results = analyze_tasks(plotter, extractor, tasks, progress_window.progress_queue, incremental=INCREMENTAL_ANALYSIS,
+                                    cancel_event=progress_window.cancel_event, prefetcher=prefetcher,
+                                    memory_budget=None if MEMORY_BUDGET_MB is None else int(MEMORY_BUDGET_MB * 1024 ** 2))
+    except Exception as e:
+        print(f"Processing failed: {e}")
+        outcome = "failed"
+    # Only reported when Cancel actually skipped files, replicates or plots
+    if outcome == "complete" and results is not None and results.partial:
+        outcome = "cancelled"
+
+    telemetry = instrumentation.get_telemetry()
+    if telemetry.enabled:
+        print(telemetry.summary())
+    instrumentation.log_peak_rss()
+    progress_window.post("done", outcome)
+
+def start_processing_in_thread(data_processor, file_searcher, final_df, base_dir, progress_window, filter_dir_name, filter_params):
     processing_thread = threading.Thread(
         target=process_files,
-        args=(data_processor, file_searcher, final_df, base_dir, uwa_data_by_concentration, progress_window, filter_dir_name)
+        args=(data_processor, file_searcher, final_df, base_dir, progress_window, filter_dir_name, filter_params)
     )
     processing_thread.start()
 
-def resolve_paths():
-    # Checking user-specific paths first
-    if os.path.exists(r"C:\Users\RodePeters\Box\SALVUS\Test Data"):
-        file_path = r"C:\Users\RodePeters\CJB Salvus\Product Development - Internal Library\Assay Development - Internal\Testing Database (Version 1-19-24).xlsx"
-        base_dir = r"C:\Users\RodePeters\Box\SALVUS\Test Data"
-    elif os.path.exists(r"C:\Users\ScottWitte\Box\SALVUS\Test Data"):
-        file_path = r"C:\Users\ScottWitte\CJB Salvus\Product Development - Internal Library\Assay Development - Internal\Testing Database (Version 1-19-24).xlsx"
-        base_dir = r"C:\Users\ScottWitte\Box\SALVUS\Test Data"
-    elif os.path.exists(r"C:\Users\mmurphy\Box\SALVUS\Test Data"):
-        file_path = r"C:\Users\mmurphy\CJB Salvus\Product Development - Internal Library\Assay Development – Internal\Testing Database (Version 1-19-24).xlsx"
-        base_dir = r"C:\Users\mmurphy\Box\SALVUS\Test Data"
-    elif os.path.exists(r"C:\Users\jpardieck\Box\SALVUS\Test Data"):
-        file_path = r"C:\Users\jpardieck\CJB Salvus\Product Development - Internal Library\Assay Development – Internal\Testing Database (Version 1-19-24).xlsx"
-        base_dir = r"C:\Users\jpardieck\Box\SALVUS\Test Data"
-    else:
-        print("Resolving file paths...")
-        file_pattern = r"**\CJB Salvus\Product Development - Internal Library\Assay Development - Internal\Testing Database (Version 1-19-24).xlsx"
-        base_dir_pattern = r"**\Box\SALVUS\Test Data"
-        file_paths = glob.glob(file_pattern, recursive=True)
-        base_dirs = glob.glob(base_dir_pattern, recursive=True)
-        file_path = file_paths[0] if file_paths else None
-        base_dir = base_dirs[0] if base_dirs else None
-    
-    if not file_path or not base_dir:
-        raise FileNotFoundError("Could not resolve file path or base directory.")
-    
-    print(f"File path resolved: {file_path}")
-    print(f"Base directory resolved: {base_dir}")
-    
-    return file_path, base_dir
-
 def main():
     print("Main process started...")
+    instrumentation.configure(enabled=TELEMETRY_ENABLED or bool(TELEMETRY_TRACE_PATH),
+                              trace_path=TELEMETRY_TRACE_PATH, verbosity=LOG_VERBOSITY)
     file_path, base_dir = resolve_paths()
 
-    print("Loading Excel file...")
-    df = pd.read_excel(file_path, sheet_name="Testing Database")
+    print("Loading filter values...")
+    filter_values = load_filter_values(file_path)
+
+    filter_params = dict(DEFAULT_FILTER_PARAMS)
 
-    filter_params = {
-        "receptor": "succyl-betacylcodextrin",
-        "testing_code": "TC58",
-        "coating_code": 122,
-        "target_analyte": "PFOA",
-        "run_result_classification": ["Low Response", "High Response", "Good", None]
-    }
+    print("Warming up the file catalogue in the background...")
+    warm_thread, warm = start_warm_up(file_path, base_dir)
 
     def update_filters():
         print("Updating filters...")
+        if warm_thread.is_alive():
+            print("Waiting for the file catalogue to finish building...")
+        warm_thread.join()
+        if "error" in warm:
+            raise warm["error"]
+        file_searcher = warm["file_searcher"]
 
-        # Create a directory name based on the selected filter parameters
-        filter_dir_name = f"{filter_params['receptor']}_{filter_params['testing_code']}_{filter_params['coating_code']}_{filter_params['target_analyte']}"
-        filter_dir_name = filter_dir_name.replace(" ", "_")  # Ensure the directory name is clean
-        
-        # Prepend the Visuals folder to the filter-specific directory name
-        filter_dir_name = os.path.join(base_dir, "Visuals", filter_dir_name)
+        from data_processor import DataProcessor
+        from trace_cache import TraceCache
 
+        data_processor = DataProcessor(testing_file=file_path, trace_cache=TraceCache())
+        filter_dir_name = build_filter_dir_name(base_dir, filter_params)
 
         # Load and filter data using the parameters
         final_df = data_processor.load_and_filter_data(filter_params)
@@ -140,28 +143,23 @@ def main():
             print("No data found with the given filters.")
             return
 
-        uwa_data_by_concentration = {}
-
         print("Initializing progress window...")
         progress_root = tk.Tk()
         progress_window = ProgressWindow(progress_root, total_files=final_df.shape[0])
         progress_root.update_idletasks()
 
         print("Starting processing in a new thread...")
-        start_processing_in_thread(data_processor, file_searcher, final_df, base_dir, uwa_data_by_concentration, progress_window, filter_dir_name)
+        start_processing_in_thread(data_processor, file_searcher, final_df, base_dir, progress_window, filter_dir_name, filter_params)
         progress_root.mainloop()
 
-    print("Preloading files...")
-    file_searcher = preload_files(base_dir)
-    data_processor = DataProcessor(testing_file=file_path)
-
     print("Starting main Tkinter loop...")
     root = tk.Tk()
     root.title("Filter Configuration")
     
     # Start the filter window and pass the update_filters callback
-    app = FilterWindow(root, df, filter_params, update_filters)
+    app = FilterWindow(root, filter_values, filter_params, update_filters)
     root.mainloop()
+    instrumentation.get_telemetry().close()
     print("Main process completed.")
 
 if __name__ == "__main__":
@@ -0,0 +1,128 @@
+import os
+import json
+import numpy as np
+from fit_results import ConcentrationFit
+from bootstrap import BootstrapResult
+from instrumentation import log
+
+MANIFEST_NAME = "analysis_manifest.json"
+MANIFEST_VERSION = 2  # 2: bootstrap samples and model selection are kept with each fit
+
+def file_signature(file_path):
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        return None
+    return [stat.st_mtime_ns, stat.st_size]
+
+def concentration_key(concentration):
+    return repr(to_json_value(concentration))
+
+def to_json_value(value):
+    # NumPy scalars from pandas columns are not JSON serialisable
+    return value.item() if hasattr(value, "item") else value
+
+def settings_fingerprint(settings):
+    # Normalised through JSON so tuples, lists and NumPy scalars compare equal after a round trip
+    return json.loads(json.dumps(settings or {}, sort_keys=True, default=to_json_value))
+
+class AnalysisManifest:
+    def __init__(self, filter_dir, settings=None):
+        self.path = os.path.join(filter_dir, MANIFEST_NAME)
+        self.settings = settings_fingerprint(settings)  # Analysis settings the recorded fits were made with
+        self.entries = {}  # concentration key -> recorded inputs and fit
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.path, "r") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return
+        if manifest.get("version") != MANIFEST_VERSION:
+            return
+        if manifest.get("settings", {}) != self.settings:
+            # Every recorded fit was made with other settings (time window, binning, bootstrap, ...)
+            log("Analysis settings changed since the last run; every concentration will be refitted.")
+            return
+        self.entries = manifest.get("concentrations", {})
+
+    def save(self):
+        manifest = {"version": MANIFEST_VERSION, "settings": self.settings, "concentrations": self.entries}
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(manifest, f, indent=1)
+        os.replace(tmp_path, self.path)
+
+    def signatures_by_concentration(self, tasks):
+        signatures = {}
+        for concentration, file_path in tasks:
+            signatures.setdefault(concentration, {})[file_path] = file_signature(file_path)
+        return signatures
+
+    def diff(self, tasks):
+        # Returns (stale concentrations, unchanged concentrations, keys of concentrations no longer present)
+        signatures = self.signatures_by_concentration(tasks)
+        stale = []
+        unchanged = []
+        for concentration, files in signatures.items():
+            entry = self.entries.get(concentration_key(concentration))
+            if entry is not None and entry["files"] == files:
+                unchanged.append(concentration)
+            else:
+                stale.append(concentration)
+
+        current_keys = {concentration_key(c) for c in signatures}
+        removed = [key for key in self.entries if key not in current_keys]
+        return stale, unchanged, removed
+
+    def record(self, fit, signatures):
+        self.entries[concentration_key(fit.concentration)] = {
+            "concentration": to_json_value(fit.concentration),
+            "files": signatures,
+            "file_order": fit.file_paths,
+            "x_range": list(fit.x_range),
+            "popt": None if fit.popt is None else np.asarray(fit.popt).tolist(),
+            "pcov": None if fit.pcov is None else np.asarray(fit.pcov).tolist(),
+            "bootstrap": None if fit.bootstrap is None else {
+                "samples": np.asarray(fit.bootstrap.samples).tolist(),
+                "attempted": fit.bootstrap.n_attempted,
+                "confidence": fit.bootstrap.confidence,
+            },
+            "model_selection": None if fit.model_selection is None else {
+                "model": fit.model_selection["model"],
+                "aic": fit.model_selection["aic"],
+                "popt": {name: np.asarray(popt).tolist() for name, popt in fit.model_selection["popt"].items()},
+                "nfev": fit.model_selection["nfev"],
+            },
+        }
+
+    def remove(self, keys):
+        for key in keys:
+            self.entries.pop(key, None)
+
+    def restore_fit(self, concentration):
+        entry = self.entries[concentration_key(concentration)]
+        popt = None if entry["popt"] is None else np.array(entry["popt"])
+        pcov = None if entry["pcov"] is None else np.array(entry["pcov"])
+        fit = ConcentrationFit(concentration, None, popt, pcov, x_range=tuple(entry["x_range"]), file_paths=entry["file_order"])
+
+        # Reused fits keep their intervals, band and model comparison, since the settings that made them still apply
+        bootstrap = entry.get("bootstrap")
+        if bootstrap is not None and fit.succeeded:
+            samples = np.array(bootstrap["samples"], dtype=float).reshape(-1, 4)
+            fit.bootstrap = BootstrapResult(concentration, samples, bootstrap["attempted"], bootstrap["confidence"])
+            fit.bootstrap.compute_band(fit.x_fit)
+            fit.descriptors.update(fit.bootstrap.descriptors())
+        selection = entry.get("model_selection")
+        if selection is not None:
+            fit.model_selection = dict(selection, popt={name: np.array(popt) for name, popt in selection["popt"].items()})
+        return fit
+
+    def update(self, fits, tasks, removed):
+        signatures = self.signatures_by_concentration(tasks)
+        for fit in fits:
+            self.record(fit, signatures.get(fit.concentration, {}))
+        self.remove(removed)
+        self.save()
+        log(f"Manifest updated: {len(fits)} concentrations refitted, {len(removed)} removed.")
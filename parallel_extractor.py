@@ -0,0 +1,118 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from pickle import PicklingError
+import time
+from instrumentation import log, span, count, record
+
+def timed_extract(data_processor, file_path):
+    # Timed inside the worker so per-file spans are accurate for process pools too
+    start = time.perf_counter()
+    trace = data_processor.extract_filtered_data(file_path)
+    return trace, time.perf_counter() - start
+
+class ParallelExtractor:
+    def __init__(self, data_processor, workers=None, use_threads=False):
+        self.data_processor = data_processor
+        self.workers = workers or os.cpu_count() or 1
+        self.use_threads = use_threads
+        self.executor = None
+        self.skipped_files = 0  # Files the last extract() dropped because it was cancelled
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=True, cancel_futures=True)
+            self.executor = None
+
+    def _get_executor(self):
+        # The pool is created lazily and reused across extract() calls
+        if self.executor is None:
+            executor_cls = ThreadPoolExecutor if self.use_threads else ProcessPoolExecutor
+            log(f"Starting {executor_cls.__name__} with {self.workers} workers...")
+            self.executor = executor_cls(max_workers=self.workers)
+        return self.executor
+
+    def _fall_back_to_threads(self, error):
+        log(f"Process pool unavailable ({error}), falling back to threads...")
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+        self.use_threads = True
+
+    def record_file(self, file_path, trace, seconds):
+        if trace is None:
+            count("extract_failures")
+        else:
+            count("trace_cache_hits" if trace.cached else "trace_cache_misses")
+        record("extract_file", seconds, file=file_path, rows=len(trace) if trace is not None else 0,
+               cached=trace.cached if trace is not None else False)
+
+    def extract(self, tasks, progress_queue=None, cancel_event=None, sink=None):
+        with span("extract_files", files=len(tasks), workers=self.workers):
+            return self._extract(tasks, progress_queue, cancel_event, sink)
+
+    def _extract(self, tasks, progress_queue, cancel_event, sink):
+        # tasks is a list of (concentration, file_path) pairs; results keep the task order and a file
+        # listed under several concentrations is parsed once. Setting cancel_event drops the queued
+        # files and returns whatever has finished. With a sink, each trace is handed to
+        # sink(concentration, trace, task_index) as it completes instead of being kept, and None is returned;
+        # task_index lets the sink restore the task order that completion order scrambles.
+        file_paths = list(dict.fromkeys(file_path for _, file_path in tasks))
+        results = [None] * len(file_paths)
+        completed = 0
+
+        concentrations_by_file = {}
+        if sink is not None:
+            for task_index, (concentration, file_path) in enumerate(tasks):
+                concentrations_by_file.setdefault(file_path, []).append((task_index, concentration))
+
+        pending = set(range(len(file_paths)))
+        while pending and not (cancel_event is not None and cancel_event.is_set()):
+            try:
+                executor = self._get_executor()
+                futures = {
+                    executor.submit(timed_extract, self.data_processor, file_paths[i]): i
+                    for i in sorted(pending)
+                }
+                for future in as_completed(futures):
+                    if future.cancelled():
+                        continue
+                    i = futures.pop(future)  # Dropping the future releases its trace once the sink has it
+                    trace, seconds = future.result()
+                    self.record_file(file_paths[i], trace, seconds)
+                    if sink is None:
+                        results[i] = trace
+                    elif trace is not None and len(trace) > 0:
+                        for task_index, concentration in concentrations_by_file[file_paths[i]]:
+                            sink(concentration, trace, task_index)
+                    pending.discard(i)
+                    completed += 1
+                    if progress_queue is not None:
+                        progress_queue.put(("progress", completed))
+                    if cancel_event is not None and cancel_event.is_set():
+                        cancelled = sum(f.cancel() for f in futures)
+                        log(f"Extraction cancelled, {cancelled} queued files skipped.")
+                        count("files_cancelled", cancelled)
+                        break
+            except (BrokenProcessPool, PicklingError, OSError) as e:
+                if self.use_threads:
+                    raise
+                self._fall_back_to_threads(e)
+
+        self.skipped_files = len(pending)
+        if sink is not None:
+            return None
+
+        uwa_data_by_concentration = {}
+        traces = dict(zip(file_paths, results))
+        for concentration, file_path in tasks:
+            trace = traces[file_path]
+            if trace is not None and len(trace) > 0:
+                uwa_data_by_concentration.setdefault(concentration, []).append(trace)
+        return uwa_data_by_concentration
@@ -0,0 +1,168 @@
+import os
+import glob
+import time
+from fit_results import FitResults
+from manifest import AnalysisManifest, concentration_key
+from run_plan import plan_runs
+from trace_accumulator import TraceAccumulator
+from instrumentation import log, count
+
+DEFAULT_FILTER_PARAMS = {
+    "receptor": "succyl-betacylcodextrin",
+    "testing_code": "TC58",
+    "coating_code": 122,
+    "target_analyte": "PFOA",
+    "run_result_classification": ["Low Response", "High Response", "Good", None]
+}
+
+def resolve_paths():
+    # Checking user-specific paths first
+    if os.path.exists(r"C:\Users\RodePeters\Box\SALVUS\Test Data"):
+        file_path = r"C:\Users\RodePeters\CJB Salvus\Product Development - Internal Library\Assay Development - Internal\Testing Database (Version 1-19-24).xlsx"
+        base_dir = r"C:\Users\RodePeters\Box\SALVUS\Test Data"
+    elif os.path.exists(r"C:\Users\ScottWitte\Box\SALVUS\Test Data"):
+        file_path = r"C:\Users\ScottWitte\CJB Salvus\Product Development - Internal Library\Assay Development - Internal\Testing Database (Version 1-19-24).xlsx"
+        base_dir = r"C:\Users\ScottWitte\Box\SALVUS\Test Data"
+    elif os.path.exists(r"C:\Users\mmurphy\Box\SALVUS\Test Data"):
+        file_path = r"C:\Users\mmurphy\CJB Salvus\Product Development - Internal Library\Assay Development – Internal\Testing Database (Version 1-19-24).xlsx"
+        base_dir = r"C:\Users\mmurphy\Box\SALVUS\Test Data"
+    elif os.path.exists(r"C:\Users\jpardieck\Box\SALVUS\Test Data"):
+        file_path = r"C:\Users\jpardieck\CJB Salvus\Product Development - Internal Library\Assay Development – Internal\Testing Database (Version 1-19-24).xlsx"
+        base_dir = r"C:\Users\jpardieck\Box\SALVUS\Test Data"
+    else:
+        log("Resolving file paths...")
+        file_pattern = r"**\CJB Salvus\Product Development - Internal Library\Assay Development - Internal\Testing Database (Version 1-19-24).xlsx"
+        base_dir_pattern = r"**\Box\SALVUS\Test Data"
+        file_paths = glob.glob(file_pattern, recursive=True)
+        base_dirs = glob.glob(base_dir_pattern, recursive=True)
+        file_path = file_paths[0] if file_paths else None
+        base_dir = base_dirs[0] if base_dirs else None
+    
+    if not file_path or not base_dir:
+        raise FileNotFoundError("Could not resolve file path or base directory.")
+    
+    log(f"File path resolved: {file_path}")
+    log(f"Base directory resolved: {base_dir}")
+    
+    return file_path, base_dir
+
+def build_filter_dir_name(base_dir, filter_params):
+    # Create a directory name based on the selected filter parameters
+    filter_dir_name = f"{filter_params['receptor']}_{filter_params['testing_code']}_{filter_params['coating_code']}_{filter_params['target_analyte']}"
+    filter_dir_name = filter_dir_name.replace(" ", "_")  # Ensure the directory name is clean
+
+    # Prepend the Visuals folder to the filter-specific directory name
+    return os.path.join(base_dir, "Visuals", filter_dir_name)
+
+def collect_tasks(final_df, file_searcher, canonical_rule="newest", report_dir=None):
+    # Repeated rows and duplicate Box copies are dropped here, and listed in a CSV under report_dir
+    plan = plan_runs(final_df, file_searcher, canonical_rule)
+    if plan.duplicates and report_dir is not None:
+        plan.write_report(os.path.join(report_dir, f"duplicate_log_files_{time.strftime('%Y%m%d-%H%M%S')}.csv"))
+    return plan.tasks
+
+def extract_tasks(extractor, tasks, progress_queue=None, cancel_event=None, prefetcher=None, accumulator=None):
+    # The prefetcher pulls the files off Box ahead of the extraction workers
+    if prefetcher is not None:
+        prefetcher.start(file_path for _, file_path in tasks)
+    try:
+        if accumulator is None:
+            return extractor.extract(tasks, progress_queue, cancel_event)
+        extractor.extract(tasks, progress_queue, cancel_event, sink=accumulator.add)
+        return accumulator.groups()
+    finally:
+        if prefetcher is not None:
+            prefetcher.cancel()
+
+def analyze_tasks(plotter, extractor, tasks, progress_queue=None, incremental=True, cancel_event=None, prefetcher=None,
+                  memory_budget=None):
+    # With a memory_budget (bytes) each trace is folded into its concentration's buffer as soon as it is
+    # extracted, and buffers beyond the budget spill to memmapped files that are removed afterwards.
+    # Only binned fits keep to the budget; raw-point fits are padded into arrays the size of the data.
+    if memory_budget is not None and not plotter.bin_width:
+        raise ValueError("A memory budget needs a bin width, since only binned fits avoid loading every raw point")
+    if memory_budget is not None and plotter.compare_full_resolution:
+        raise ValueError("A memory budget cannot be combined with the full-resolution comparison, which fits every raw point")
+    accumulator = None if memory_budget is None else TraceAccumulator(memory_budget)
+    try:
+        return run_analysis(plotter, extractor, tasks, progress_queue, incremental, cancel_event, prefetcher, accumulator)
+    finally:
+        if accumulator is not None:
+            accumulator.close()
+
+def no_data(extractor):
+    if extractor.skipped_files:
+        # Cancelled before any file finished
+        log("Run cancelled before any log data was extracted.")
+        results = FitResults([], None)
+        results.partial = True
+        return results
+    log("No usable log data found for the given filters.")
+    return None
+
+def run_analysis(plotter, extractor, tasks, progress_queue, incremental, cancel_event, prefetcher, accumulator):
+    if not incremental:
+        if progress_queue is not None:
+            progress_queue.put(("total", len({file_path for _, file_path in tasks})))
+        uwa_data_by_concentration = extract_tasks(extractor, tasks, progress_queue, cancel_event, prefetcher, accumulator)
+        if not uwa_data_by_concentration:
+            return no_data(extractor)
+        return plotter.compute_and_plot_individual(uwa_data_by_concentration, partial=extractor.skipped_files > 0)
+
+    # Diff the matched files against the last run and only redo concentrations whose inputs changed
+    settings = plotter.analysis_settings()
+    settings["time_window"] = list(extractor.data_processor.time_window)
+    manifest = AnalysisManifest(plotter.filter_dir, settings)
+    stale, unchanged, removed = manifest.diff(tasks)
+    log(f"{len(stale)} concentrations changed, {len(unchanged)} unchanged, {len(removed)} removed since the last run.")
+    count("concentrations_reused", len(unchanged))
+
+    reused_fits = [manifest.restore_fit(concentration) for concentration in unchanged]
+    if not stale and not removed:
+        log("Nothing changed since the last run; existing plots are up to date.")
+        return FitResults(reused_fits, None)
+
+    stale_set = set(stale)
+    stale_tasks = [task for task in tasks if task[0] in stale_set]
+    if progress_queue is not None:
+        progress_queue.put(("total", len({file_path for _, file_path in stale_tasks})))
+    uwa_data_by_concentration = extract_tasks(extractor, stale_tasks, progress_queue, cancel_event, prefetcher, accumulator)
+    if not uwa_data_by_concentration and extractor.skipped_files:
+        return no_data(extractor)
+
+    if extractor.skipped_files:
+        log("Run cancelled; fitting the files that finished.")
+    results, fresh = plotter.compute_and_plot_incremental(uwa_data_by_concentration, reused_fits,
+                                                          partial=extractor.skipped_files > 0)
+    if results.partial:
+        # Partial results are plotted, but the manifest is left alone so the next run redoes them
+        log("Run cancelled before every concentration was fitted and plotted; the manifest was not updated.")
+        return results
+
+    # Stale concentrations that produced no usable data are dropped so they are retried next time
+    fitted = {fit.concentration for fit in fresh}
+    removed += [concentration_key(c) for c in stale if c not in fitted]
+    manifest.update(fresh, stale_tasks, removed)
+    return results
+
+def run_filter_set(data_processor, file_searcher, extractor, filter_params, base_dir, progress_queue=None, render_mode="serial",
+                   incremental=True, fit_store=None, bin_width=None, bin_statistic="mean", prefetcher=None,
+                   canonical_rule="newest", memory_budget=None, bootstrap_replicates=0, bootstrap_time_budget=None,
+                   bootstrap_seed=0, initial_guess="data", model_selection=False, compare_full_resolution=False):
+    filter_dir_name = build_filter_dir_name(base_dir, filter_params)
+
+    final_df = data_processor.load_and_filter_data(filter_params)
+    if final_df.empty:
+        log("No data found with the given filters.")
+        return None
+
+    from plotting import Plotting  # SciPy and Matplotlib are only imported once there is something to fit
+
+    plotter = Plotting(base_dir, filter_dir_name, render_mode=render_mode, filter_params=dict(filter_params), fit_store=fit_store,
+                       initial_guess=initial_guess, model_selection=model_selection, bin_width=bin_width, bin_statistic=bin_statistic,
+                       compare_full_resolution=compare_full_resolution, bootstrap_replicates=bootstrap_replicates,
+                       bootstrap_time_budget=bootstrap_time_budget, bootstrap_workers=extractor.workers, bootstrap_seed=bootstrap_seed)
+    tasks = collect_tasks(final_df, file_searcher, canonical_rule, report_dir=plotter.overall_org_dir)
+    log(f"Total files to process: {len(tasks)}")
+    return analyze_tasks(plotter, extractor, tasks, progress_queue, incremental=incremental, prefetcher=prefetcher,
+                         memory_budget=memory_budget)
@@ -1,15 +1,44 @@
 import os
 import numpy as np
 import pandas as pd
-import matplotlib
-matplotlib.use('Agg')  # Use a non-GUI backend suitable for background processing
-import matplotlib.pyplot as plt
 from scipy.optimize import curve_fit
 import time
+from batch_fitting import batch_fit_sigmoid, default_initial_guess, PARAM_NAMES, INITIAL_GUESSES
+from fit_results import ConcentrationFit, FitResults
+from renderer import Renderer
+from trace_group import TraceGroup
+from kinetics import kinetic_descriptors, descriptors_for
+from fit_models import data_driven_guess, select_model
+from binning import bin_group
+from bootstrap import Bootstrapper, DEFAULT_CONFIDENCE, INTERVAL_DESCRIPTORS
+from instrumentation import log, span, count
 
 class Plotting:
-    def __init__(self, base_dir, filter_name):
+    def __init__(self, base_dir, filter_name, fit_individual_runs=False, render_mode="serial", render_workers=None,
+                 filter_params=None, fit_store=None, initial_guess="data", model_selection=False,
+                 bin_width=None, bin_statistic="mean", compare_full_resolution=False, bootstrap_replicates=0,
+                 bootstrap_confidence=DEFAULT_CONFIDENCE, bootstrap_time_budget=None, bootstrap_workers=None, bootstrap_seed=0,
+                 cancel_event=None):
+        if initial_guess not in INITIAL_GUESSES:
+            raise ValueError(f"Unknown initial guess {initial_guess!r}, expected one of {INITIAL_GUESSES}")
         self.base_dir = base_dir
+        self.initial_guess = initial_guess  # "data" derives p0 from the traces, "legacy" uses [max(y), median(x), 1, min(y)]
+        self.model_selection = model_selection  # Also compare 4PL, 5PL and exponential association by AIC
+        # Optional pre-fit reduction: bin_width seconds per bin, "mean" or "median" across runs
+        self.bin_width = bin_width
+        self.bin_statistic = bin_statistic
+        self.compare_full_resolution = compare_full_resolution  # Also fit the raw points and report the difference
+        # Resample runs within each concentration for confidence intervals (0 replicates disables it)
+        self.bootstrap_settings = {"replicates": bootstrap_replicates, "confidence": bootstrap_confidence,
+                                   "time_budget": bootstrap_time_budget, "seed": bootstrap_seed}
+        self.bootstrapper = None
+        if bootstrap_replicates:
+            self.bootstrapper = Bootstrapper(bootstrap_replicates, confidence=bootstrap_confidence, time_budget=bootstrap_time_budget,
+                                             workers=bootstrap_workers, seed=bootstrap_seed, bin_statistic=bin_statistic,
+                                             cancel_event=cancel_event)
+        self.filter_params = filter_params
+        self.fit_store = fit_store  # FitStore that keeps every fit's parameters, or None
+        self.fit_individual_runs = fit_individual_runs  # Also fit each run on its own (drawn dotted)
         self.filter_dir = os.path.join(self.base_dir, filter_name)  # Add the filter parameter layer
         os.makedirs(self.filter_dir, exist_ok=True)
 
@@ -20,6 +49,21 @@ class Plotting:
         self.individual_visuals_dir = os.path.join(self.filter_dir, "individual")
         os.makedirs(self.individual_visuals_dir, exist_ok=True)
 
+        # Rendering is a separate stage: "skip", "serial" or "parallel" (one figure per worker)
+        self.renderer = Renderer(self.individual_visuals_dir, self.overall_visuals_dir, mode=render_mode, workers=render_workers,
+                                 cancel_event=cancel_event)
+
+    def analysis_settings(self):
+        # Everything that changes a fit's result; recorded in the analysis manifest so a change refits everything
+        return {
+            "initial_guess": self.initial_guess,
+            "model_selection": self.model_selection,
+            "fit_individual_runs": self.fit_individual_runs,
+            "bin_width": self.bin_width,
+            "bin_statistic": self.bin_statistic if self.bin_width else None,
+            "bootstrap": self.bootstrap_settings if self.bootstrapper is not None else None,
+        }
+
     def safe_exp(self, x):
         # Clamp the values to avoid overflow in exp
         return np.exp(np.clip(x, -500, 500))
@@ -28,88 +72,230 @@ class Plotting:
         # Use the safe exponential to avoid overflow
         return L / (1 + self.safe_exp(-k * (x - x0))) + b
 
-    def compute_and_plot_individual(self, uwa_data_by_concentration):
-        all_fits = []
-        plt.figure()
+    def guess(self, x_data, y_data):
+        if self.initial_guess == "data":
+            return data_driven_guess(x_data, y_data)
+        return default_initial_guess(x_data, y_data)
 
-        for concentration, data_list in uwa_data_by_concentration.items():
-            # Create directory for individual concentration plots
-            concentration_dir = os.path.join(self.individual_visuals_dir, str(concentration))
-            os.makedirs(concentration_dir, exist_ok=True)
+    def nearest_converged(self, index, order, converged):
+        # Walk outwards from index along the concentration order to the closest converged group
+        position = order.index(index)
+        for distance in range(1, len(order)):
+            for neighbour in (position - distance, position + distance):
+                if 0 <= neighbour < len(order) and converged[order[neighbour]]:
+                    return order[neighbour]
+        return None
 
-            all_x_data = np.array([])
-            all_y_data = np.array([])
+    def fit_groups(self, x_list, y_list, labels, order=None, weights=None):
+        # Fit every group in one vectorized pass from data-derived guesses. Groups that do not converge
+        # are warm-started from their nearest converged neighbour in `order`, then retried with curve_fit.
+        guesses = [self.guess(x_data, y_data) for x_data, y_data in zip(x_list, y_list)]
+        result = batch_fit_sigmoid(x_list, y_list, p0=guesses, weights=weights)
+        popts = list(result.popt)
+        pcovs = list(result.pcov)
+        nfev = [int(n) for n in result.nfev]
+        converged = list(result.success)
 
-            # Create a figure for the individual concentration plot
-            plt.figure()
+        if order is not None and not all(converged) and any(converged):
+            warm = {}
+            for i in range(len(x_list)):
+                if not converged[i]:
+                    neighbour = self.nearest_converged(i, order, converged)
+                    if neighbour is not None:
+                        warm[i] = popts[neighbour]
+            if warm:
+                count("fit_warm_starts", len(warm))
+                indices = list(warm)
+                retry = batch_fit_sigmoid([x_list[i] for i in indices], [y_list[i] for i in indices], p0=[warm[i] for i in indices],
+                                          weights=None if weights is None else [weights[i] for i in indices])
+                for row, i in enumerate(indices):
+                    nfev[i] += int(retry.nfev[row])
+                    guesses[i] = warm[i]
+                    if retry.success[row]:
+                        popts[i], pcovs[i], converged[i] = retry.popt[row], retry.pcov[row], True
 
-            for data in data_list:
-                x_data = data["Time from Start (sec)"]
-                y_data = data["UWA_BaselineCorr_2"]
+        fits = []
+        for i, (x_data, y_data) in enumerate(zip(x_list, y_list)):
+            if converged[i]:
+                fits.append((popts[i], pcovs[i], nfev[i]))
+                continue
+            # Blank UWA cells are NaN; curve_fit rejects them, so only finite points (and their sigma) go in
+            x_data, y_data = np.asarray(x_data, dtype=float), np.asarray(y_data, dtype=float)
+            sigma = None if weights is None else 1 / np.asarray(weights[i], dtype=float)
+            finite = np.isfinite(x_data) & np.isfinite(y_data)
+            if sigma is not None:
+                finite &= np.isfinite(sigma)
+            if np.count_nonzero(finite) <= 4:
+                count("failed_fits")
+                log(f"Failed to fit sigmoid for {labels[i]}: only {np.count_nonzero(finite)} finite points")
+                fits.append(None)
+                continue
+            count("fit_fallbacks")
+            try:
+                popt, pcov, info, _, _ = curve_fit(self.sigmoid, x_data[finite], y_data[finite], guesses[i],
+                                                   sigma=None if sigma is None else sigma[finite], method='trf', maxfev=10000,
+                                                   full_output=True)
+                nfev[i] += int(info["nfev"])
+                fits.append((popt, pcov, nfev[i]))
+            except Exception as e:
+                count("failed_fits")
+                log(f"Failed to fit sigmoid for {labels[i]}: {e}")
+                fits.append(None)
 
-                all_x_data = np.concatenate((all_x_data, x_data))
-                all_y_data = np.concatenate((all_y_data, y_data))
+        count("fit_evaluations", sum(nfev))
+        return fits
 
-                # Plot data for the individual concentration
-                plt.plot(x_data, y_data, alpha=0.5)
+    def concentration_order(self, concentrations):
+        # Indices of concentrations sorted by value, so neighbours are adjacent concentrations
+        try:
+            return sorted(range(len(concentrations)), key=lambda i: float(concentrations[i]))
+        except (TypeError, ValueError):
+            return sorted(range(len(concentrations)), key=lambda i: str(concentrations[i]))
 
-            # Fit sigmoid to the combined data
-            try:
-                p0 = [max(all_y_data), np.median(all_x_data), 1, min(all_y_data)]
-                popt, _ = curve_fit(self.sigmoid, all_x_data, all_y_data, p0, method='trf', maxfev=10000)
-                x_fit = np.linspace(min(all_x_data), max(all_x_data), 1000)
-                y_fit = self.sigmoid(x_fit, *popt)
-                plt.plot(x_fit, y_fit, linestyle='--', color='#FF69B4')
-
-                # Add vertical line for the minimum of the second derivative
-                second_derivative = np.gradient(np.gradient(y_fit, x_fit), x_fit)
-                min_index = np.argmin(second_derivative)
-                plt.axvline(x=x_fit[min_index], color='#FF69B4', linestyle='--')
-
-                all_fits.append((concentration, x_fit, y_fit))
-            except Exception as e:
-                print(f"Failed to fit sigmoid for concentration {concentration}: {e}")
-
-            plt.xlabel("Time from Start (sec)")
-            plt.ylabel("UWA_BaselineCorr_2")
-            plt.title(f"UWA_BaselineCorr_2 for Concentration {concentration}")
-            plt.grid(True)
-
-            # Save individual plot
-            timestamp = time.strftime("%Y%m%d-%H%M%S")
-            plot_path = os.path.join(concentration_dir, f"uwa_BaselineCorr_2_plot_{concentration}_{timestamp}.png")
-            plt.savefig(plot_path)
-            plt.close()
-
-        # Sort the fits by concentration to ensure an ordinal relationship
-        all_fits.sort(key=lambda x: x[0])  # Sort by concentration
-
-        # Grouped plot
-        plt.figure()
-        for concentration, x_fit, y_fit in all_fits:
-            line, = plt.plot(x_fit, y_fit, label=f'Sigmoid Fit {concentration}')
-
-            # Add vertical line for minimum second derivative on the grouped plot
-            second_derivative = np.gradient(np.gradient(y_fit, x_fit), x_fit)
-            min_index = np.argmin(second_derivative)
-            plt.axvline(x=x_fit[min_index], color=line.get_color(), linestyle='--')
-
-        plt.legend(fontsize='x-small')
-        plt.xlabel("Time from Start (sec)")
-        plt.ylabel("UWA_BaselineCorr_2")
-        plt.title("Grouped UWA_BaselineCorr_2 for All Concentrations")
-        plt.grid(True)
-
-        grouped_plot_path = os.path.join(self.overall_visuals_dir, f"grouped_uwa_BaselineCorr_2_plot_{timestamp}.png")
-        plt.savefig(grouped_plot_path)
-        plt.close()
+    def compute_fits(self, uwa_data_by_concentration):
+        timestamp = time.strftime("%Y%m%d-%H%M%S")
+        concentrations = list(uwa_data_by_concentration.keys())
+
+        # Each concentration's runs live in one contiguous buffer shared by fitting, plotting and the CSV.
+        # Streaming runs hand over TraceGroups that were already accumulated (possibly memmapped).
+        groups = {
+            c: data if isinstance(data, TraceGroup) else TraceGroup.from_traces(c, data)
+            for c, data in uwa_data_by_concentration.items()
+        }
+
+        labels = [f"concentration {c}" for c in concentrations]
+        order = self.concentration_order(concentrations)
+
+        binned = {}
+        if self.bin_width:
+            # Fit each concentration's binned mean/median curve, weighted by its standard error
+            binned = {c: bin_group(groups[c], self.bin_width, self.bin_statistic) for c in concentrations}
+            concentration_fits = self.fit_groups(
+                [binned[c].time for c in concentrations],
+                [binned[c].values for c in concentrations],
+                labels, order=order,
+                weights=[binned[c].weights for c in concentrations]
+            )
+            if self.compare_full_resolution:
+                full_fits = self.fit_groups([groups[c].time for c in concentrations], [groups[c].values for c in concentrations],
+                                            labels, order=order)
+                self.write_binning_report(concentrations, binned, groups, concentration_fits, full_fits, timestamp)
+        else:
+            # Fit all concentration groups together on the pooled runs
+            concentration_fits = self.fit_groups(
+                [groups[c].time for c in concentrations],
+                [groups[c].values for c in concentrations],
+                labels, order=order
+            )
+
+        run_fits = {c: {} for c in concentrations}
+        if self.fit_individual_runs:
+            run_keys = [(c, i) for c in concentrations for i in range(len(groups[c]))]
+            run_data = [groups[c].run(i) for c, i in run_keys]
+            fitted = self.fit_groups(
+                [x for x, _ in run_data],
+                [y for _, y in run_data],
+                [f"run {i} of concentration {c}" for c, i in run_keys]
+            )
+            for (c, i), fit in zip(run_keys, fitted):
+                if fit is not None:
+                    run_fits[c][i] = fit[0]
+
+        # Kinetic descriptors for every successful group in one vectorized call
+        fitted = [i for i, fit in enumerate(concentration_fits) if fit is not None]
+        descriptors = kinetic_descriptors(np.array([concentration_fits[i][0] for i in fitted]).reshape(-1, 4))
+        descriptors_by_index = {i: descriptors_for(descriptors, row) for row, i in enumerate(fitted)}
+
+        fits = []
+        for i, (concentration, fit) in enumerate(zip(concentrations, concentration_fits)):
+            popt, pcov, nfev = fit if fit is not None else (None, None, None)
+            concentration_fit = ConcentrationFit(concentration, groups[concentration], popt, pcov, run_fits[concentration],
+                                                 descriptors=descriptors_by_index.get(i))
+            concentration_fit.nfev = nfev
+            concentration_fit.binned = binned.get(concentration)
+            if self.model_selection and concentration_fit.succeeded:
+                # Compared on the data the 4PL was fitted to, so binned runs never load every raw point
+                curve = binned[concentration] if concentration in binned else groups[concentration]
+                concentration_fit.model_selection = select_model(curve.time, curve.values, popt)
+            fits.append(concentration_fit)
 
+        if self.bootstrapper is not None:
+            self.add_confidence_intervals(fits)
+        return FitResults(fits, timestamp)
+
+    def add_confidence_intervals(self, fits):
+        bootstraps = self.bootstrapper.run(fits)
+        for fit in fits:
+            result = bootstraps.get(fit.concentration)
+            if result is None:
+                continue
+            fit.bootstrap = result
+            result.compute_band(fit.x_fit)
+            fit.descriptors.update(result.descriptors())
+
+    def write_bootstrap_csv(self, results):
+        # Covers fits reused from the manifest as well as the ones bootstrapped in this run
+        rows = []
+        for fit in results.successful():
+            result = fit.bootstrap
+            if result is None:
+                continue
+            row = {"concentration": fit.concentration, "replicates": result.n_replicates, "attempted": result.n_attempted}
+            for name in PARAM_NAMES + INTERVAL_DESCRIPTORS:
+                low, high = result.intervals.get(name, (np.nan, np.nan))
+                row[f"{name}_ci_low"], row[f"{name}_ci_high"] = low, high
+            rows.append(row)
+
+        if not rows:
+            return None
+        report_path = os.path.join(self.overall_org_dir, f"bootstrap_intervals_{results.timestamp}.csv")
+        pd.DataFrame(rows).to_csv(report_path, index=False)
+        log(f"Bootstrap confidence intervals saved to {report_path}")
+        return report_path
+
+    def write_binning_report(self, concentrations, binned, groups, binned_fits, full_fits, timestamp):
+        rows = []
+        for concentration, binned_fit, full_fit in zip(concentrations, binned_fits, full_fits):
+            row = {"concentration": concentration, "raw_points": groups[concentration].n_points, "bins": len(binned[concentration])}
+            for label, fit in (("binned", binned_fit), ("full", full_fit)):
+                popt = fit[0] if fit is not None else [np.nan] * 4
+                for name, value in zip(PARAM_NAMES, popt):
+                    row[f"{name}_{label}"] = value
+                row[f"nfev_{label}"] = fit[2] if fit is not None else None
+                row[f"second_derivative_min_{label}"] = (
+                    kinetic_descriptors(popt)["second_derivative_min"][0] if fit is not None else np.nan
+                )
+            for name in PARAM_NAMES + ("second_derivative_min",):
+                row[f"{name}_difference"] = row[f"{name}_binned"] - row[f"{name}_full"]
+            rows.append(row)
+
+        report_path = os.path.join(self.overall_org_dir, f"binning_report_{timestamp}.csv")
+        pd.DataFrame(rows).to_csv(report_path, index=False)
+        log(f"Binned vs full-resolution fit comparison saved to {report_path}")
+        return report_path
+
+    def store_fits(self, fits):
+        if self.fit_store is None or not fits:
+            return
+        try:
+            self.fit_store.record(fits, filter_params=self.filter_params, filter_dir=self.filter_dir)
+        except Exception as e:
+            log(f"Could not record fits in the fit store: {e}")
+
+    def bootstrap_interrupted(self):
+        # Fits whose intervals are missing replicates are kept out of the fit store
+        return self.bootstrapper is not None and self.bootstrapper.interrupted
+
+    def render(self, results, concentrations=None, grouped=True):
+        return self.renderer.render(results, concentrations=concentrations, grouped=grouped)
+
+    def write_filenames_csv(self, results):
         filenames_dict = {}
         max_length = 0  # Track the maximum length of the lists
 
-        for concentration, data_list in uwa_data_by_concentration.items():
-            filenames = [os.path.basename(data["File Name"].iloc[0]) for data in data_list]
-            filenames_dict[concentration] = filenames
+        for fit in results:
+            filenames = [os.path.basename(file_name) for file_name in fit.file_names]
+            filenames_dict[fit.concentration] = filenames
             if len(filenames) > max_length:
                 max_length = len(filenames)
 
@@ -119,6 +305,37 @@ class Plotting:
                 filenames_dict[concentration].append(None)
 
         filenames_df = pd.DataFrame(filenames_dict)
-        csv_path = os.path.join(self.overall_org_dir, f"filenames_by_concentration_{timestamp}.csv")
+        csv_path = os.path.join(self.overall_org_dir, f"filenames_by_concentration_{results.timestamp}.csv")
         filenames_df.to_csv(csv_path, index=False)
-        print(f"Filenames for concentrations saved to {csv_path}")
\ No newline at end of file
+        log(f"Filenames for concentrations saved to {csv_path}")
+        return csv_path
+
+    def compute_and_plot_incremental(self, uwa_data_by_concentration, reused_fits, partial=False):
+        # Only the concentrations in uwa_data_by_concentration are refitted and redrawn;
+        # reused_fits come from the manifest and only contribute to the grouped plot and CSV
+        with span("fit", concentrations=len(uwa_data_by_concentration)):
+            fresh = self.compute_fits(uwa_data_by_concentration)
+        partial = partial or self.bootstrap_interrupted()
+        if not partial:
+            self.store_fits(fresh.fits)
+        results = FitResults(fresh.fits + list(reused_fits), fresh.timestamp)
+        self.write_filenames_csv(results)
+        self.write_bootstrap_csv(results)
+        with span("render", mode=self.renderer.mode):
+            self.render(results, concentrations=[fit.concentration for fit in fresh])
+        results.partial = partial or self.renderer.interrupted
+        return results, fresh
+
+    def compute_and_plot_individual(self, uwa_data_by_concentration, partial=False):
+        # partial results (e.g. from a cancelled run) are plotted but kept out of the fit store
+        with span("fit", concentrations=len(uwa_data_by_concentration)):
+            results = self.compute_fits(uwa_data_by_concentration)
+        partial = partial or self.bootstrap_interrupted()
+        if not partial:
+            self.store_fits(results.fits)
+        self.write_filenames_csv(results)
+        self.write_bootstrap_csv(results)
+        with span("render", mode=self.renderer.mode):
+            self.render(results)
+        results.partial = partial or self.renderer.interrupted
+        return results
@@ -0,0 +1,81 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from instrumentation import log, count, record
+
+# Reads kept in flight at once; each is I/O bound, so this can exceed the core count
+DEFAULT_MAX_IN_FLIGHT = 8
+CHUNK_SIZE = 1024 * 1024
+
+def read_through(file_path, chunk_size=CHUNK_SIZE):
+    # Reading every byte makes Box download the file and leaves it in the OS page cache,
+    # so the extractor's later open and parse no longer waits on the network
+    n_bytes = 0
+    with open(file_path, "rb", buffering=0) as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            n_bytes += len(chunk)
+    return n_bytes
+
+class Prefetcher:
+    def __init__(self, trace_cache=None, time_window=None, max_in_flight=DEFAULT_MAX_IN_FLIGHT, chunk_size=CHUNK_SIZE):
+        self.trace_cache = trace_cache  # Files already in the trace cache are never read again, so they are skipped
+        self.time_window = time_window
+        self.max_in_flight = max_in_flight
+        self.chunk_size = chunk_size
+        self.executor = None
+
+    @classmethod
+    def for_processor(cls, data_processor, **kwargs):
+        return cls(trace_cache=data_processor.trace_cache, time_window=data_processor.time_window, **kwargs)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        self.cancel()
+
+    def needs_read(self, file_path):
+        if self.trace_cache is None or self.time_window is None:
+            return True
+        try:
+            return not self.trace_cache.contains(file_path, *self.time_window)
+        except OSError:
+            return False  # Missing file; the extractor reports it
+
+    def _prefetch(self, file_path):
+        if not self.needs_read(file_path):
+            count("prefetch_skipped")
+            return 0
+        start = time.perf_counter()
+        try:
+            n_bytes = read_through(file_path, self.chunk_size)
+        except OSError as e:
+            log(f"Prefetch failed for {file_path}: {e}", "debug")
+            return 0
+        count("prefetch_files")
+        count("prefetch_bytes", n_bytes)
+        record("prefetch_file", time.perf_counter() - start, file=file_path, bytes=n_bytes)
+        return n_bytes
+
+    def start(self, file_paths):
+        # Queue reads in the order the extractor will ask for the files; at most max_in_flight run at once.
+        # Returns immediately so the reads overlap with parsing and fitting.
+        self.cancel()
+        file_paths = list(dict.fromkeys(file_paths))
+        if not file_paths or self.max_in_flight <= 0:
+            return
+        log(f"Prefetching {len(file_paths)} log files with {self.max_in_flight} reads in flight...", "debug")
+        self.executor = ThreadPoolExecutor(max_workers=self.max_in_flight, thread_name_prefix="prefetch")
+        for file_path in file_paths:
+            self.executor.submit(self._prefetch, file_path)
+
+    def cancel(self):
+        # Drops queued reads; reads already in flight finish in the background
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
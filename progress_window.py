@@ -1,8 +1,11 @@
 import tkinter as tk
 from tkinter import ttk
+import queue
+import threading
+import time
 
 class ProgressWindow:
-    def __init__(self, root, total_files):
+    def __init__(self, root, total_files, poll_interval_ms=200):
         self.root = root
         self.root.title("Processing Files")
         
@@ -18,11 +21,26 @@ class ProgressWindow:
         self.count_label = ttk.Label(self.root, text=f"0/{total_files} files processed")
         self.count_label.pack(padx=20, pady=10)
 
+        self.rate_label = ttk.Label(self.root, text="")
+        self.rate_label.pack(padx=20, pady=(0, 10))
+
+        # Workers check this event and stop early; whatever finished is still fitted and plotted
+        self.cancel_event = threading.Event()
+        self.cancel_button = ttk.Button(self.root, text="Cancel", command=self.cancel)
+        self.cancel_button.pack(padx=20, pady=10)
+
         self.close_button = ttk.Button(self.root, text="Close Program", command=self.root.quit)
         self.close_button.pack(padx=20, pady=10)
         self.close_button.pack_forget()  # Initially hide the button
 
+        # Worker threads only ever touch this queue; the Tk main loop drains it every poll_interval_ms,
+        # so redraws are batched at a bounded rate however fast files complete
+        self.progress_queue = queue.Queue()
+        self.poll_interval_ms = poll_interval_ms
+        self.start_time = None
+
         self.center_window()
+        self.root.after(self.poll_interval_ms, self.poll_queue)
 
     def center_window(self):
         self.root.update_idletasks()
@@ -32,14 +50,65 @@ class ProgressWindow:
         y = (self.root.winfo_screenheight() // 2) - (height // 2)
         self.root.geometry(f'{width}x{height}+{x}+{y}')
 
+    def post(self, kind, value=None):
+        # Thread-safe: ("total", n), ("progress", completed), ("status", text) or ("done", outcome)
+        self.progress_queue.put((kind, value))
+
+    def cancel(self):
+        self.cancel_event.set()
+        self.cancel_button.config(state="disabled")
+        self.label.config(text="Cancelling, finishing the files already in progress...")
+
     def update_progress(self, value):
+        if self.start_time is None:
+            self.start_time = time.perf_counter()
+        total = self.progress["maximum"]
         self.progress["value"] = value
-        self.count_label.config(text=f"{value}/{self.progress['maximum']} files processed")
-        self.root.update_idletasks()
+        self.count_label.config(text=f"{value}/{total} files processed")
+
+        elapsed = time.perf_counter() - self.start_time
+        if value and elapsed > 0:
+            rate = value / elapsed
+            remaining = max(total - value, 0) / rate
+            self.rate_label.config(text=f"{rate:.1f} files/s, about {int(remaining // 60)}:{int(remaining % 60):02d} remaining")
+
+    def poll_queue(self):
+        latest = None
+        done = None
+        try:
+            while True:
+                kind, value = self.progress_queue.get_nowait()
+                if kind == "progress":
+                    latest = value
+                elif kind == "total":
+                    self.progress["maximum"] = max(value, 1)
+                    self.start_time = time.perf_counter()
+                elif kind == "status":
+                    self.label.config(text=value)
+                elif kind == "done":
+                    done = value
+        except queue.Empty:
+            pass
+
+        if latest is not None:
+            self.update_progress(latest)
+        if done is not None:
+            self.processing_complete(outcome=done)
+            return
+        self.root.after(self.poll_interval_ms, self.poll_queue)
 
-    def processing_complete(self):
-        self.label.config(text="Processing complete!")
-        self.count_label.config(text="All files have been processed.")
+    def processing_complete(self, outcome="complete"):
+        # outcome is "complete", "cancelled" or "failed"
+        if outcome == "cancelled":
+            self.label.config(text="Processing cancelled, partial results saved.")
+            self.count_label.config(text=f"{int(self.progress['value'])}/{int(self.progress['maximum'])} files processed before cancelling.")
+        elif outcome == "failed":
+            self.label.config(text="Processing failed, see the console for details.")
+        else:
+            self.label.config(text="Processing complete!")
+            self.count_label.config(text="All files have been processed.")
+        self.rate_label.config(text="")
+        self.cancel_button.pack_forget()
         self.close_button.pack()  # Show the close button
 
     def close(self):
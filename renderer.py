@@ -0,0 +1,137 @@
+import os
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from batch_fitting import sigmoid
+from fit_models import MODEL_FUNCTIONS
+from instrumentation import log
+
+RENDER_MODES = ("skip", "serial", "parallel")
+
+def draw_confidence(ax, fit, color, inflection=True):
+    # Bootstrap band around the fitted curve, plus the inflection time interval as a shaded span
+    if fit.bootstrap is None or fit.bootstrap.band is None:
+        return
+    lower, upper = fit.bootstrap.band
+    ax.fill_between(fit.x_fit, lower, upper, color=color, alpha=0.2, linewidth=0)
+    interval = fit.bootstrap.intervals.get("second_derivative_min")
+    if inflection and interval is not None:
+        ax.axvspan(max(interval[0], fit.x_fit[0]), min(interval[1], fit.x_fit[-1]), color=color, alpha=0.1)
+
+def render_concentration(fit, plot_path):
+    # Object-oriented Figure API only, so this is safe to run in any worker
+    fig = Figure()
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+
+    for run_index, (x_data, y_data, _) in enumerate(fit.group.runs()):
+        line, = ax.plot(x_data, y_data, alpha=0.5)
+
+        run_popt = fit.run_fits.get(run_index)
+        if run_popt is not None:
+            x_run_fit = np.linspace(np.min(x_data), np.max(x_data), 200)
+            ax.plot(x_run_fit, sigmoid(x_run_fit, *run_popt), linestyle=':', color=line.get_color())
+
+    if fit.binned is not None:
+        ax.errorbar(fit.binned.time, fit.binned.values, yerr=fit.binned.standard_error, fmt='.', color='black',
+                    markersize=3, elinewidth=0.5, alpha=0.7)
+
+    if fit.succeeded:
+        ax.plot(fit.x_fit, fit.y_fit, linestyle='--', color='#FF69B4')
+        # Add vertical line for the minimum of the second derivative
+        if fit.x_fit[0] <= fit.inflection_time <= fit.x_fit[-1]:
+            ax.axvline(x=fit.inflection_time, color='#FF69B4', linestyle='--')
+        draw_confidence(ax, fit, '#FF69B4')
+
+        # Show the AIC-preferred model when it is not the 4PL
+        selection = fit.model_selection
+        if selection is not None and selection["model"] != "4PL":
+            best = selection["model"]
+            ax.plot(fit.x_fit, MODEL_FUNCTIONS[best](fit.x_fit, *selection["popt"][best]), linestyle='-.', color='gray',
+                    label=f"{best} (AIC preferred)")
+            ax.legend(fontsize='x-small')
+
+    ax.set_xlabel("Time from Start (sec)")
+    ax.set_ylabel("UWA_BaselineCorr_2")
+    ax.set_title(f"UWA_BaselineCorr_2 for Concentration {fit.concentration}")
+    ax.grid(True)
+    fig.savefig(plot_path)
+    return plot_path
+
+def render_grouped(fits, plot_path):
+    fig = Figure()
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+
+    for fit in fits:
+        line, = ax.plot(fit.x_fit, fit.y_fit, label=f'Sigmoid Fit {fit.concentration}')
+        # Add vertical line for minimum second derivative on the grouped plot
+        if fit.x_fit[0] <= fit.inflection_time <= fit.x_fit[-1]:
+            ax.axvline(x=fit.inflection_time, color=line.get_color(), linestyle='--')
+        draw_confidence(ax, fit, line.get_color(), inflection=False)
+
+    if fits:
+        ax.legend(fontsize='x-small')
+    ax.set_xlabel("Time from Start (sec)")
+    ax.set_ylabel("UWA_BaselineCorr_2")
+    ax.set_title("Grouped UWA_BaselineCorr_2 for All Concentrations")
+    ax.grid(True)
+    fig.savefig(plot_path)
+    return plot_path
+
+class Renderer:
+    def __init__(self, individual_visuals_dir, overall_visuals_dir, mode="serial", workers=None, cancel_event=None):
+        if mode not in RENDER_MODES:
+            raise ValueError(f"Unknown render mode {mode!r}, expected one of {RENDER_MODES}")
+        self.individual_visuals_dir = individual_visuals_dir
+        self.overall_visuals_dir = overall_visuals_dir
+        self.mode = mode
+        self.workers = workers
+        self.cancel_event = cancel_event  # Checked between plots; setting it skips the plots not yet started
+        self.interrupted = False  # Whether the last render() skipped plots
+
+    def cancelled(self):
+        return self.cancel_event is not None and self.cancel_event.is_set()
+
+    def concentration_plot_path(self, concentration, timestamp):
+        concentration_dir = os.path.join(self.individual_visuals_dir, str(concentration))
+        os.makedirs(concentration_dir, exist_ok=True)
+        return os.path.join(concentration_dir, f"uwa_BaselineCorr_2_plot_{concentration}_{timestamp}.png")
+
+    def grouped_plot_path(self, timestamp):
+        return os.path.join(self.overall_visuals_dir, f"grouped_uwa_BaselineCorr_2_plot_{timestamp}.png")
+
+    def render(self, results, concentrations=None, grouped=True):
+        # concentrations limits rendering to the requested plots (None renders all of them)
+        if self.mode == "skip":
+            return []
+
+        # Fits restored from a manifest carry no traces, so only their grouped curve can be drawn
+        fits = [fit for fit in results
+                if fit.group is not None and (concentrations is None or fit.concentration in concentrations)]
+        jobs = [(render_concentration, fit, self.concentration_plot_path(fit.concentration, results.timestamp)) for fit in fits]
+        if grouped:
+            jobs.append((render_grouped, results.successful(), self.grouped_plot_path(results.timestamp)))
+
+        plot_paths = []
+        if self.mode == "parallel" and len(jobs) > 1:
+            with ProcessPoolExecutor(max_workers=self.workers) as executor:
+                futures = [executor.submit(func, data, path) for func, data, path in jobs]
+                for future in futures:
+                    if self.cancelled():
+                        for pending in futures:
+                            pending.cancel()
+                        break
+                    plot_paths.append(future.result())
+        else:
+            for func, data, path in jobs:
+                if self.cancelled():
+                    break
+                plot_paths.append(func(data, path))
+
+        self.interrupted = len(plot_paths) < len(jobs)
+        if self.interrupted:
+            log(f"Rendering cancelled, {len(jobs) - len(plot_paths)} plots skipped.")
+        log(f"Rendered {len(plot_paths)} plots.")
+        return plot_paths
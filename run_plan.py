@@ -0,0 +1,105 @@
+import os
+import csv
+import hashlib
+from instrumentation import log, count
+
+# How one copy is chosen when a log basename exists in several Box folders
+CANONICAL_RULES = ("newest", "shortest_path", "content_hash")
+REPORT_COLUMNS = ("kind", "log_filename", "concentration", "kept", "dropped")
+
+def modified_time(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return -1
+
+def content_hash(path, chunk_size=1024 * 1024):
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def shortest(paths):
+    return min(paths, key=lambda path: (len(path), path))
+
+def choose_copies(paths, rule="newest"):
+    # Returns (kept, dropped) with exactly one kept copy. content_hash first collapses byte-identical
+    # copies (keeping the shortest path of each), then keeps the newest of the distinct versions.
+    if len(paths) < 2:
+        return list(paths), []
+    if rule == "newest":
+        kept = [max(paths, key=lambda path: (modified_time(path), -len(path), path))]
+    elif rule == "shortest_path":
+        kept = [shortest(paths)]
+    elif rule == "content_hash":
+        by_hash = {}
+        for path in paths:
+            try:
+                by_hash.setdefault(content_hash(path), []).append(path)
+            except OSError:
+                by_hash.setdefault(path, []).append(path)  # Unreadable copies stand alone; the extractor reports them if kept
+        newest = max(by_hash.values(), key=lambda copies: (max(modified_time(path) for path in copies), -len(shortest(copies)),
+                                                            shortest(copies)))
+        kept = [shortest(newest)]
+    else:
+        raise ValueError(f"Unknown canonical copy rule {rule!r}, expected one of {CANONICAL_RULES}")
+    return kept, [path for path in paths if path not in kept]
+
+class RunPlan:
+    def __init__(self, tasks, duplicates):
+        self.tasks = tasks  # (concentration, file_path) with every physical file scheduled once per concentration
+        self.duplicates = duplicates  # one dict per dropped row or copy, keyed by REPORT_COLUMNS
+
+    def __len__(self):
+        return len(self.tasks)
+
+    @property
+    def unique_files(self):
+        return list(dict.fromkeys(file_path for _, file_path in self.tasks))
+
+    def write_report(self, report_path):
+        with open(report_path, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=REPORT_COLUMNS)
+            writer.writeheader()
+            writer.writerows(self.duplicates)
+        log(f"Duplicate log files report saved to {report_path}")
+        return report_path
+
+def plan_runs(final_df, file_searcher, rule="newest"):
+    tasks = []
+    duplicates = []
+    seen = set()
+    concentrations_by_file = {}
+    copies = {}  # Each basename is resolved once, however many rows list it
+
+    for log_filename, concentration in zip(final_df["Cleaned Log Filename"], final_df["Analyte Concentration"]):
+        if log_filename not in copies:
+            copies[log_filename] = choose_copies(file_searcher.search_files(log_filename), rule)
+            kept, dropped = copies[log_filename]
+            for path in dropped:
+                duplicates.append({"kind": "copy", "log_filename": log_filename, "concentration": concentration,
+                                   "kept": ";".join(kept), "dropped": path})
+        kept, _ = copies[log_filename]
+
+        for file_path in kept:
+            if (concentration, file_path) in seen:
+                duplicates.append({"kind": "row", "log_filename": log_filename, "concentration": concentration,
+                                   "kept": file_path, "dropped": file_path})
+                continue
+            seen.add((concentration, file_path))
+            previous = concentrations_by_file.setdefault(file_path, concentration)
+            if previous != concentration:
+                # Kept under both concentrations (the extractor still parses it once), but flagged for review
+                log(f"{log_filename} is listed under concentrations {previous} and {concentration}")
+                duplicates.append({"kind": "conflicting_concentration", "log_filename": log_filename,
+                                   "concentration": concentration, "kept": file_path, "dropped": ""})
+            tasks.append((concentration, file_path))
+
+    dropped_rows = sum(1 for d in duplicates if d["kind"] == "row")
+    dropped_copies = sum(1 for d in duplicates if d["kind"] == "copy")
+    count("duplicate_rows_dropped", dropped_rows)
+    count("duplicate_copies_dropped", dropped_copies)
+    if dropped_rows or dropped_copies:
+        log(f"Dropped {dropped_rows} repeated database rows and {dropped_copies} duplicate file copies ({rule}).")
+    return RunPlan(tasks, duplicates)
@@ -0,0 +1,64 @@
+import os
+import sys
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import batch_fitting
+from batch_fitting import batch_fit_sigmoid, sigmoid
+
+TRUE_POPT = np.array([1.0, 300.0, 0.03, 0.1])
+
+def make_curve(n_points=300, seed=0):
+    rng = np.random.default_rng(seed)
+    x = np.linspace(0, 600, n_points)
+    return x, sigmoid(x, *TRUE_POPT) + rng.normal(0, 0.01, n_points)
+
+def test_nan_samples_are_ignored():
+    # A blank UWA cell is read as NaN; it must not freeze the fit at its starting point
+    x, y = make_curve()
+    y[10] = np.nan
+    p0 = [1.2, 280.0, 0.02, 0.05]
+    result = batch_fit_sigmoid([x], [y], p0=[p0])
+    assert result.success[0]
+    assert not np.allclose(result.popt[0], p0)
+    assert np.allclose(result.popt[0], TRUE_POPT, rtol=0.05)
+    assert result.n_points[0] == len(x) - 1
+
+def test_all_nan_group_fails():
+    x, y = make_curve()
+    result = batch_fit_sigmoid([x, x], [y, np.full_like(y, np.nan)])
+    assert result.success[0]
+    assert not result.success[1]
+
+def test_damping_blow_up_without_accepted_step_fails(monkeypatch):
+    # Every candidate step evaluates to NaN, so the cost never improves and damping runs away
+    real_sigmoid_batch = batch_fitting.sigmoid_batch
+    calls = []
+
+    def first_call_only(x, params):
+        calls.append(1)
+        values = real_sigmoid_batch(x, params)
+        return values if len(calls) == 1 else np.full_like(values, np.nan)
+
+    monkeypatch.setattr(batch_fitting, "sigmoid_batch", first_call_only)
+    x, y = make_curve()
+    p0 = [1.2, 280.0, 0.02, 0.05]
+    result = batch_fit_sigmoid([x], [y], p0=[p0])
+    assert not result.success[0]
+    assert np.allclose(result.popt[0], p0)
+
+def test_fallback_fits_finite_points_only(tmp_path, monkeypatch):
+    import plotting
+    fit = plotting.batch_fit_sigmoid
+
+    def never_converges(*args, **kwargs):
+        result = fit(*args, **kwargs)
+        result.success[:] = False
+        return result
+
+    monkeypatch.setattr(plotting, "batch_fit_sigmoid", never_converges)
+    x, y = make_curve()
+    y[7] = np.nan
+    fits = plotting.Plotting(str(tmp_path), "filters").fit_groups([x, x[:3]], [y, y[:3]], ["nan", "short"])
+    assert fits[0] is not None and np.allclose(fits[0][0], TRUE_POPT, rtol=0.05)
+    assert fits[1] is None
@@ -0,0 +1,30 @@
+import os
+import sys
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from dlog_reader import Trace
+from trace_accumulator import TraceAccumulator
+
+def make_trace(task_index):
+    n_points = 5 + task_index
+    return Trace(f"run_{task_index}.dlog", np.arange(n_points, dtype=float), np.full(n_points, float(task_index)))
+
+def accumulate(memory_budget, spill_root, completion_order):
+    with TraceAccumulator(memory_budget, spill_root=str(spill_root)) as accumulator:
+        for task_index in completion_order:
+            accumulator.add(1, make_trace(task_index), task_index)
+        group = accumulator.groups()[1]
+        return group.file_paths, [float(group.run(i)[1][0]) for i in range(len(group))], accumulator.spilled_bytes
+
+def test_runs_are_in_task_order_in_memory(tmp_path):
+    file_paths, first_values, spilled = accumulate(None, tmp_path, [3, 0, 2, 1])
+    assert spilled == 0
+    assert file_paths == [f"run_{i}.dlog" for i in range(4)]
+    assert first_values == [0.0, 1.0, 2.0, 3.0]
+
+def test_runs_are_in_task_order_after_spilling(tmp_path):
+    file_paths, first_values, spilled = accumulate(64, tmp_path, [3, 0, 2, 1])
+    assert spilled > 0
+    assert file_paths == [f"run_{i}.dlog" for i in range(4)]
+    assert first_values == [0.0, 1.0, 2.0, 3.0]
@@ -0,0 +1,149 @@
+import os
+import time
+import shutil
+import tempfile
+import numpy as np
+from cache_paths import cache_dir
+from trace_group import TraceGroup
+from instrumentation import log, count
+
+DEFAULT_MEMORY_BUDGET = 512 * 1024 ** 2  # 512 MB of buffered trace data
+STALE_SPILL_SECONDS = 24 * 3600
+
+class GroupBuffer:
+    # One concentration's runs: recent runs in memory, older ones appended to two raw float64 files
+    def __init__(self, concentration):
+        self.concentration = concentration
+        self.time_chunks = []
+        self.value_chunks = []
+        self.lengths = []
+        self.file_paths = []
+        self.task_indices = []  # Runs arrive in completion order; to_group puts them back in task order
+        self.memory_bytes = 0
+        self.spill_paths = None
+
+    def add(self, trace, task_index):
+        # Copied so memmapped trace-cache entries and worker results can be released straight away
+        time_values = np.array(trace.time, dtype=np.float64)
+        uwa_values = np.array(trace.values, dtype=np.float64)
+        self.time_chunks.append(time_values)
+        self.value_chunks.append(uwa_values)
+        self.lengths.append(len(time_values))
+        self.file_paths.append(trace.file_path)
+        self.task_indices.append(task_index)
+        added = time_values.nbytes + uwa_values.nbytes
+        self.memory_bytes += added
+        return added
+
+    def spill(self, spill_dir):
+        if self.spill_paths is None:
+            prefix = os.path.join(spill_dir, f"group_{id(self):x}")
+            self.spill_paths = (f"{prefix}_time.f64", f"{prefix}_values.f64")
+        for path, chunks in zip(self.spill_paths, (self.time_chunks, self.value_chunks)):
+            with open(path, "ab") as f:
+                for chunk in chunks:
+                    chunk.tofile(f)
+        released = self.memory_bytes
+        self.time_chunks, self.value_chunks, self.memory_bytes = [], [], 0
+        return released
+
+    def reorder_spill(self, order, starts):
+        # Rewrites the spill files with runs in the given order, one run in memory at a time
+        for path in self.spill_paths:
+            source = np.memmap(path, dtype=np.float64, mode="r", shape=(int(starts[-1]),))
+            with open(f"{path}.sorted", "wb") as f:
+                for i in order:
+                    np.asarray(source[starts[i]:starts[i + 1]]).tofile(f)
+            del source
+            os.replace(f"{path}.sorted", path)
+
+    def to_group(self, spill_dir):
+        # Runs are laid out in task order, so file order, colours and bootstrap draws do not depend on which
+        # worker finished first
+        order = np.argsort(self.task_indices, kind="stable")
+        lengths = np.asarray(self.lengths, dtype=np.intp)
+        offsets = np.zeros(len(lengths) + 1, dtype=np.intp)
+        np.cumsum(lengths[order], out=offsets[1:])
+        if self.spill_paths is None:
+            time_values = np.concatenate([self.time_chunks[i] for i in order]) if self.time_chunks else np.empty(0)
+            uwa_values = np.concatenate([self.value_chunks[i] for i in order]) if self.value_chunks else np.empty(0)
+        else:
+            # Read-only memmaps: the fit and plots page the data in instead of holding it all
+            self.spill(spill_dir)
+            if np.any(np.diff(order) < 0):
+                starts = np.zeros(len(lengths) + 1, dtype=np.intp)
+                np.cumsum(lengths, out=starts[1:])
+                self.reorder_spill(order, starts)
+            time_values = np.memmap(self.spill_paths[0], dtype=np.float64, mode="r", shape=(int(offsets[-1]),))
+            uwa_values = np.memmap(self.spill_paths[1], dtype=np.float64, mode="r", shape=(int(offsets[-1]),))
+        self.time_chunks, self.value_chunks = [], []
+        return TraceGroup(self.concentration, time_values, uwa_values, offsets, [self.file_paths[i] for i in order])
+
+class TraceAccumulator:
+    # Folds each extracted trace into its concentration's buffer as it arrives, so the traces themselves
+    # are not kept. When buffered data exceeds memory_budget bytes, the largest buffers spill to disk.
+    def __init__(self, memory_budget=DEFAULT_MEMORY_BUDGET, spill_root=None):
+        self.memory_budget = memory_budget
+        self.spill_root = spill_root or cache_dir("spill")
+        self.spill_dir = None
+        self.buffers = {}
+        self.memory_bytes = 0
+        self.peak_memory_bytes = 0
+        self.spilled_bytes = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _spill_dir(self):
+        if self.spill_dir is None:
+            self.purge_stale()
+            self.spill_dir = tempfile.mkdtemp(prefix="run_", dir=self.spill_root)
+        return self.spill_dir
+
+    def purge_stale(self):
+        # Spill directories left behind by crashed runs (or still mapped when a run finished on Windows)
+        cutoff = time.time() - STALE_SPILL_SECONDS
+        for name in os.listdir(self.spill_root):
+            path = os.path.join(self.spill_root, name)
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    shutil.rmtree(path, ignore_errors=True)
+            except OSError:
+                pass
+
+    def add(self, concentration, trace, task_index=None):
+        if trace is None or len(trace) == 0:
+            return
+        buffer = self.buffers.get(concentration)
+        if buffer is None:
+            buffer = self.buffers[concentration] = GroupBuffer(concentration)
+        self.memory_bytes += buffer.add(trace, len(buffer.lengths) if task_index is None else task_index)
+        self.peak_memory_bytes = max(self.peak_memory_bytes, self.memory_bytes)
+        while self.memory_budget is not None and self.memory_bytes > self.memory_budget:
+            largest = max(self.buffers.values(), key=lambda b: b.memory_bytes)
+            if largest.memory_bytes == 0:
+                break
+            released = largest.spill(self._spill_dir())
+            self.memory_bytes -= released
+            self.spilled_bytes += released
+            count("spilled_bytes", released)
+
+    def __len__(self):
+        return len(self.buffers)
+
+    def groups(self):
+        if self.spilled_bytes:
+            log(f"Spilled {self.spilled_bytes / 1024 ** 2:.1f} MB of trace data to {self.spill_dir} "
+                f"(budget {self.memory_budget / 1024 ** 2:.1f} MB).")
+        groups = {c: buffer.to_group(self.spill_dir) for c, buffer in self.buffers.items()}
+        self.memory_bytes = 0
+        return groups
+
+    def close(self):
+        # Memmapped spill files cannot be removed on Windows while mapped; purge_stale catches those later
+        if self.spill_dir is not None:
+            shutil.rmtree(self.spill_dir, ignore_errors=True)
+            self.spill_dir = None
@@ -0,0 +1,126 @@
+import os
+import sys
+import hashlib
+import argparse
+import numpy as np
+from cache_paths import cache_dir
+
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3  # 2 GB
+CACHE_FORMAT_VERSION = 1
+
+class TraceCache:
+    def __init__(self, cache_root=None, max_bytes=DEFAULT_MAX_BYTES, dtype=np.float64):
+        self.cache_root = cache_root or cache_dir("traces")
+        self.max_bytes = max_bytes
+        self.dtype = np.dtype(dtype)
+        self._total_bytes = None  # Computed lazily on the first write
+
+    def key(self, file_path, t_min, t_max):
+        stat = os.stat(file_path)
+        raw = f"{os.path.abspath(file_path)}|{stat.st_mtime_ns}|{stat.st_size}|{t_min}|{t_max}|{self.dtype.str}|{CACHE_FORMAT_VERSION}"
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def entry_path(self, key):
+        # Two-level fan-out keeps directory listings short
+        return os.path.join(self.cache_root, key[:2], f"{key}.npy")
+
+    def contains(self, file_path, t_min, t_max):
+        return os.path.exists(self.entry_path(self.key(file_path, t_min, t_max)))
+
+    def get(self, file_path, t_min, t_max):
+        try:
+            path = self.entry_path(self.key(file_path, t_min, t_max))
+            trace = np.load(path, mmap_mode="r")
+        except (OSError, ValueError):
+            return None
+        # Touch the entry so eviction is least-recently-used
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return trace[0], trace[1]
+
+    def put(self, file_path, t_min, t_max, time_values, uwa_values):
+        path = self.entry_path(self.key(file_path, t_min, t_max))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        trace = np.vstack([np.asarray(time_values, dtype=self.dtype), np.asarray(uwa_values, dtype=self.dtype)])
+
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.save(f, trace)
+        os.replace(tmp_path, path)
+
+        if self._total_bytes is None:
+            self._total_bytes = sum(size for _, _, size in self._entries())
+        else:
+            self._total_bytes += os.path.getsize(path)
+        if self.max_bytes is not None and self._total_bytes > self.max_bytes:
+            self.prune()
+
+    def _entries(self):
+        entries = []
+        for dirpath, _, filenames in os.walk(self.cache_root):
+            for name in filenames:
+                if not name.endswith(".npy"):
+                    continue
+                path = os.path.join(dirpath, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, path, stat.st_size))
+        return entries
+
+    def prune(self, max_bytes=None):
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        entries = sorted(self._entries())
+        total = sum(size for _, _, size in entries)
+        removed = 0
+
+        # Evict least recently used entries until the cache fits the size cap
+        for _, path, size in entries:
+            if total <= max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+
+        self._total_bytes = total
+        return removed, total
+
+    def clear(self):
+        return self.prune(max_bytes=0)
+
+    def stats(self):
+        entries = self._entries()
+        return len(entries), sum(size for _, _, size in entries)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage the extracted UWA trace cache.")
+    parser.add_argument("--cache-dir", default=None, help="Cache directory (defaults to the user cache)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    prune_parser = subparsers.add_parser("prune", help="Evict least recently used traces down to a size cap")
+    prune_parser.add_argument("--max-size-mb", type=float, default=DEFAULT_MAX_BYTES / 1024 ** 2)
+    subparsers.add_parser("clear", help="Remove every cached trace")
+    subparsers.add_parser("stats", help="Show the number and size of cached traces")
+
+    args = parser.parse_args(argv)
+    cache = TraceCache(cache_root=args.cache_dir)
+
+    if args.command == "prune":
+        removed, total = cache.prune(max_bytes=int(args.max_size_mb * 1024 ** 2))
+        print(f"Removed {removed} traces, {total / 1024 ** 2:.1f} MB remaining.")
+    elif args.command == "clear":
+        removed, _ = cache.clear()
+        print(f"Removed {removed} traces.")
+    else:
+        count, total = cache.stats()
+        print(f"{count} traces cached, {total / 1024 ** 2:.1f} MB in {cache.cache_root}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
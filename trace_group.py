@@ -0,0 +1,43 @@
+import numpy as np
+
+class TraceGroup:
+    # Struct-of-arrays holding every run of one concentration in one contiguous buffer
+    __slots__ = ("concentration", "time", "values", "offsets", "file_paths")
+
+    def __init__(self, concentration, time, values, offsets, file_paths):
+        self.concentration = concentration
+        self.time = time
+        self.values = values
+        self.offsets = offsets  # run i occupies [offsets[i], offsets[i + 1])
+        self.file_paths = file_paths
+
+    @classmethod
+    def from_traces(cls, concentration, traces):
+        lengths = np.fromiter((len(trace) for trace in traces), dtype=np.intp, count=len(traces))
+        offsets = np.zeros(len(traces) + 1, dtype=np.intp)
+        np.cumsum(lengths, out=offsets[1:])
+
+        time = np.empty(offsets[-1])
+        values = np.empty(offsets[-1])
+        for i, trace in enumerate(traces):
+            time[offsets[i]:offsets[i + 1]] = trace.time
+            values[offsets[i]:offsets[i + 1]] = trace.values
+
+        return cls(concentration, time, values, offsets, [trace.file_path for trace in traces])
+
+    def __len__(self):
+        return len(self.file_paths)
+
+    @property
+    def n_points(self):
+        return int(self.offsets[-1])
+
+    def run(self, index):
+        # Views into the shared buffers, no copies
+        start, end = self.offsets[index], self.offsets[index + 1]
+        return self.time[start:end], self.values[start:end]
+
+    def runs(self):
+        for index, file_path in enumerate(self.file_paths):
+            time, values = self.run(index)
+            yield time, values, file_path